@@ -0,0 +1,243 @@
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from time import perf_counter as now
+
+import numpy as np
+
+from configs import cfg
+from indices import build_tempo_spatial_index, load_index, save_index
+from indices.parallel import index_table
+from indices.region import occupancy_stats
+from indices.segments import SegmentTable
+from indices.tempo_spatial import TempoSpatialIndex
+from search.base import base_search
+from search.baseline.search_methods import sliding_framework
+from search.baseline.ssg import StateGraph
+from search.one_pass import one_pass_search
+from search.rest import df_filter
+from search.verifier import verified_queue
+from utilities.box2D import Box2D
+from utilities.config import config
+from utilities.data_preprocessing import group_by_frame, traj_data
+from utilities.synthetic import synthetic_borders, synthetic_tracks
+from utilities.trajectory import TrajectoryIntervalSeg
+
+METHODS = ['index_one_pass', 'index_base', 'sliding_base', 'sliding_state', 'sliding_vectorized', 'ssg']
+# methods scanning every frame, which are given fewer queries
+SLOW_METHODS = {'sliding_base', 'sliding_state', 'ssg'}
+
+
+def ssg_search(df, region, labels, duration, interval):
+    """
+    feed frames filtered by labels and region to a `StateGraph`
+    :return: states of the graph after the last frame
+    """
+    graph = StateGraph(duration[0])
+    dfilter = partial(df_filter, reg_verifier=region.enclose, target_label=labels.keys())
+    frames = dict(iter(group_by_frame(df, interval)))
+    for fid in range(interval[0], interval[1] + 1):  # the graph expects every frame, even empty ones
+        objs = frames.get(fid)
+        graph.construct_maintain(fid, frozenset() if objs is None else frozenset(dfilter(objs)['oid']))
+    return graph.states
+
+
+def build_index(data, cols, cls_map, index_cfg, fps):
+    return build_tempo_spatial_index(traj_data(data, cols, fps, cls_map, scale=1), index_cfg)
+
+
+def measure_build(data, cols, cls_map, index_cfg, fps):
+    """
+    :return: (index, build time in seconds, peak traced memory in bytes)
+    """
+    start = now()
+    index = build_index(data, cols, cls_map, index_cfg, fps)
+    elapsed = now() - start
+    # tracing slows building down a lot, so memory is measured by another build
+    tracemalloc.start()
+    build_index(data, cols, cls_map, index_cfg, fps)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, elapsed, peak
+
+
+def measure_snapshot(index, index_cfg):
+    """
+    time saving $index and loading it back by its layout, against indexing the loaded segment table again
+    :return: dict of seconds
+    """
+    with tempfile.TemporaryDirectory() as path:
+        start = now()
+        save_index(index, path)
+        saved = now()
+        load_index(path, index_cfg)
+        loaded = now()
+        index_table(TempoSpatialIndex(index_cfg), SegmentTable.load(path))
+        reindexed = now()
+    return {'save_s': saved - start, 'load_s': loaded - saved, 'reindex_s': reindexed - loaded}
+
+
+def gen_queries(bbox, labels, frames, num, seed, region_size=(0.05, 0.3), duration=(5, 100), span=(0.1, 0.5)):
+    """
+    random queries over the synthetic field
+    :param region_size: (min, max) side of query regions relative to the field
+    :param span: (min, max) length of query intervals relative to all frames
+    :return: list of (region, labels, duration range, interval)
+    """
+    rng = np.random.default_rng(seed)
+    xmin, xmax, ymin, ymax = bbox
+    queries = []
+    for _ in range(num):
+        w, h = rng.uniform(*region_size, 2) * (xmax - xmin, ymax - ymin)
+        x, y = rng.uniform(xmin, xmax - w), rng.uniform(ymin, ymax - h)
+        label_num = rng.integers(1, min(labels, 2) + 1)
+        query_labels = {int(label): 1 for label in rng.choice(labels, label_num, replace=False)}
+        length = int(rng.uniform(*span) * frames)
+        begin = int(rng.integers(0, frames - length + 1))
+        queries.append((Box2D((int(x), int(x + w), int(y), int(y + h))), query_labels, duration,
+                        (begin, begin + length)))
+    return queries
+
+
+def measure_queries(search_mtd, data, queries):
+    """
+    :return: statistics of query latency in seconds and result counts
+    """
+    latencies, counts = [], []
+    for query in queries:
+        start = now()
+        counts.append(sum(1 for _ in search_mtd(data, *query)))
+        latencies.append(now() - start)
+    latencies = np.array(latencies)
+    return {'queries': len(queries), 'total_s': latencies.sum().item(),
+            'mean_s': latencies.mean().item(), 'p50_s': np.percentile(latencies, 50).item(),
+            'p95_s': np.percentile(latencies, 95).item(), 'max_s': latencies.max().item(),
+            'throughput_qps': len(queries) / latencies.sum().item(), 'results': sum(counts)}
+
+
+def measure_verified_queue(sizes, seed, parts=3):
+    """
+    time the ordered emission of `verified_queue` in a busy cell, where thousands of candidates overlap in time
+    and each leaves $parts parts spread over the whole cell lifetime.
+    :param sizes: numbers of candidates
+    :return: {size: statistics}
+    """
+    rng = np.random.default_rng(seed)
+    report = {}
+    for size in sizes:
+        begins = np.sort(rng.integers(0, size, size))
+        offsets = np.sort(rng.integers(0, 10 * size, (size, parts)), axis=1)
+        found = [[TrajectoryIntervalSeg(cand, begin + offset, 0, 5) for offset in cand_offsets]
+                 for cand, (begin, cand_offsets) in enumerate(zip(begins.tolist(), offsets.tolist()))]
+        gc.disable()  # as `timeit` does, collections over all parts would dominate otherwise
+        start = now()
+        emitted = sum(1 for _ in verified_queue(range(size), found.__getitem__, begins.tolist().__getitem__))
+        elapsed = now() - start
+        gc.enable()
+        report[size] = {'total_s': elapsed, 'per_candidate_us': elapsed / size * 1e6, 'parts': emitted}
+    return report
+
+
+def commit_id():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    if args.micro:
+        return {'commit': commit_id(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'params': vars(args),
+                'micro': {'verified_queue': measure_verified_queue(args.micro_sizes, args.seed)}}
+    data, cols, cls_map, bbox = synthetic_tracks(args.objects, args.frames, args.labels, args.density,
+                                                 seed=args.seed)
+    config.gird_border = synthetic_borders(bbox, args.grid)
+    queries = gen_queries(bbox, args.labels, args.frames, args.queries, args.seed)
+    report = {'commit': commit_id(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'params': vars(args),
+              'data': {'points': len(data), 'bbox': bbox}, 'build': {}, 'query': {}}
+
+    indices = {}
+    for method in args.methods:
+        if not method.startswith('index'):
+            continue
+        index_cfg = cfg.clone()
+        index_cfg.INDEX.REGION.TYPE = args.region
+        index_cfg.INDEX.REGION.GRID.SPACE = tuple(args.grid)
+        if method == 'index_base':
+            index_cfg.merge_from_file('configs/region_base.yml')
+        if args.tempo == 'interval':
+            index_cfg.INDEX.SEARCH_METHOD.TEMPO = index_cfg.INDEX.SEARCH_METHOD.TEMPO.replace('Fuzzy', 'Interval')
+        key = index_cfg.INDEX.SEARCH_METHOD.TEMPO
+        if key not in indices:
+            indices[key], elapsed, peak = measure_build(data, cols, cls_map, index_cfg, args.fps)
+            report['build'][key] = {'time_s': elapsed, 'peak_bytes': peak,
+                                    'occupancy': occupancy_stats(indices[key].cell_occupancy())}
+            if args.snapshot:
+                report['build'][key]['snapshot'] = measure_snapshot(indices[key], index_cfg)
+        indices[method] = indices[key]
+
+    for method in args.methods:
+        match method:
+            case 'index_one_pass':
+                search_mtd, target = one_pass_search, indices[method]
+            case 'index_base':
+                search_mtd, target = base_search, indices[method]
+            case 'sliding_base':
+                search_mtd, target = partial(sliding_framework, method='base'), data
+            case 'sliding_state':
+                search_mtd, target = partial(sliding_framework, method='state'), data
+            case 'sliding_vectorized':
+                search_mtd, target = partial(sliding_framework, method='vectorized'), data
+            case 'ssg':
+                search_mtd, target = ssg_search, data
+            case _:
+                raise ValueError(f'wrong query type: {method}')
+        num = args.slow_queries if method in SLOW_METHODS else len(queries)
+        try:
+            report['query'][method] = measure_queries(search_mtd, target, queries[:num])
+        except Exception as e:  # keep measuring other methods, a failure is a result too
+            report['query'][method] = {'error': repr(e)}
+        print(method, report['query'][method], file=sys.stderr)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='benchmark index building and queries on synthetic trajectories')
+    parser.add_argument('--objects', type=int, default=2000)
+    parser.add_argument('--frames', type=int, default=5000)
+    parser.add_argument('--labels', type=int, default=3)
+    parser.add_argument('--density', type=float, default=5., help='objects in a frame per 1000 * 1000 area')
+    parser.add_argument('--grid', type=int, nargs=2, default=(8, 6), help='the number of grid borders')
+    parser.add_argument('--region', default='grid', choices=['grid', 'quantile'],
+                        help='INDEX.REGION.TYPE, cells are decided by --grid')
+    parser.add_argument('--tempo', default='fuzzy', choices=['fuzzy', 'interval'],
+                        help='search the temporal level per duration or by an interval tree')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='also time saving and loading built indices, see `load_index`')
+    parser.add_argument('--fps', type=int, default=1, help='keep a point every fps frames when indexing')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--slow-queries', type=int, default=3, help='the number of queries of sliding methods')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=METHODS)
+    parser.add_argument('--micro', action='store_true',
+                        help='run microbenchmarks of query stages instead of building and querying indices')
+    parser.add_argument('--micro-sizes', type=int, nargs='+', default=[1000, 4000, 16000],
+                        help='the number of overlapping candidates in microbenchmarks')
+    parser.add_argument('--out', help='append results as a json line to this file instead of printing them')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = json.dumps(run(args))
+    if args.out:
+        with open(args.out, 'a') as f:
+            print(report, file=f)
+    else:
+        print(report)
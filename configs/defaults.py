@@ -5,14 +5,32 @@ _C = CN()
 
 _C.INDEX = CN()
 _C.INDEX.SEARCH_METHOD = CN()
+# 'FuzzyInnerAll' or 'FuzzySearch' search segments per duration, their 'IntervalInnerAll' and 'IntervalSearch'
+# counterparts search an interval tree of segments instead, see `IntervalIndex`
 _C.INDEX.SEARCH_METHOD.TEMPO = 'FuzzyInnerAll'
 _C.INDEX.SEARCH_METHOD.REGION = 'NotSureSearch'
 _C.INDEX.SEARCH_METHOD.USER = 'NotSureSearch'
 
+# what index leaves hold: 'object' for `TrajectorySequenceSeg`s,
+# 'columnar' for row ids of the segment table
+_C.INDEX.STORE = 'object'
+
+_C.INDEX.BUILD = CN()
+# build sub-indices in a process pool if more than one worker
+_C.INDEX.BUILD.WORKERS = 1
+# split segments of a label into at most this many shards by ranges of grid cells
+_C.INDEX.BUILD.CELL_SHARDS = 1
+
+_C.INDEX.OCCUPANCY = CN()
+# frames in a time bucket of the occupancy tables rejecting queries which can not be satisfied,
+# see `OccupancyTable`. 0 to disable them
+_C.INDEX.OCCUPANCY.BUCKET = 64
+
 _C.INDEX.REGION = CN()
 # should the region index simply return all region or
 # distinguish between regions surely in the query region from others
 _C.INDEX.REGION.COARSE = False
+# 'grid': cells of `config.gird_border`, 'quantile': borders at quantiles of indexed points, see `set_region_borders`
 _C.INDEX.REGION.TYPE = 'grid'
 
 _C.INDEX.REGION.GRID = CN()
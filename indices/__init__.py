@@ -1 +1,2 @@
-from .builder import build_tempo_spatial_index
+from .builder import build_tempo_spatial_index, bulk_build_tempo_spatial_index
+from .snapshot import save_index, load_index
@@ -1,28 +1,57 @@
-from collections import defaultdict
-from itertools import pairwise
-
 import numpy as np
 
+from indices.parallel import index_table
 from indices.region import GridRegion
-from indices.user_indices import get_user_indices
-from utilities.trajectory import TrajectorySequenceSeg
+from indices.segments import SegmentTable
+from indices.tempo_spatial import TempoSpatialIndex
+from utilities.config import config
+from utilities.data_preprocessing import quantile_border
 
 
 def build_tempo_spatial_index(trajs, cfg):
     # 1. find trajectory's region
     # config.gird_border = gen_border(trajs.bbox, 10, 15)
-    reg = GridRegion()
-    UserIdx = get_user_indices(cfg)
-    user_idx = defaultdict(UserIdx)
+    if cfg.INDEX.REGION.TYPE != 'grid':
+        trajs = list(trajs)
+        set_region_borders(np.concatenate([traj[-1] for traj in trajs]) if trajs else np.empty((0, 2)), cfg)
+    user_idx = TempoSpatialIndex(cfg)
+    index_table(user_idx, SegmentTable.from_trajs(trajs, GridRegion()))
+    return user_idx
 
-    for tid, beg, cls_id, track in trajs:
-        pos = reg.index(track)
-        break_points = np.flatnonzero(np.diff(pos, prepend=-1))
-        spt_idx = user_idx[cls_id]
-        track_lifelong = len(track)
-        for start, end in pairwise(break_points):
-            ts_beg = start + beg
-            spt_idx.add(((track[start], track_lifelong), (end - start, ts_beg)),
-                        TrajectorySequenceSeg(tid, ts_beg, cls_id, track[start:end]))
 
+def bulk_build_tempo_spatial_index(tracks, cols_name: list, fps, label_map, cfg, scale=100):
+    """
+    build the index from the whole point table at once,
+    the same as `build_tempo_spatial_index(traj_data(tracks, cols_name, fps, label_map, scale), cfg)`,
+    except that data-driven borders are derived from all points rather than the ones kept by $fps.
+    :param tracks: pandas data frame of tracks
+    :param cols_name: [track_id, frame_id, x, y] are wanted, supply their actual properties name in order.
+    :param fps: integer
+    :param label_map: map traj id to its label
+    :param cfg: index config
+    :param scale: the unit of our coordinate is 'cm', tell us how we scale raw (x, y).
+    :return: the index
+    """
+    oids, fids = (tracks[col].to_numpy() for col in cols_name[:2])
+    points = (tracks[cols_name[-2:]].to_numpy() * scale).astype(np.int32)
+    if cfg.INDEX.REGION.TYPE != 'grid':
+        set_region_borders(points, cfg)
+    user_idx = TempoSpatialIndex(cfg)
+    index_table(user_idx, SegmentTable.from_points(oids, fids, points, label_map, GridRegion(), fps))
     return user_idx
+
+
+def set_region_borders(points, cfg):
+    """
+    derive `config.gird_border` from points when `INDEX.REGION.TYPE` asks for data-driven cells:
+    'grid' keeps borders set by the caller, 'quantile' puts about the same number of points in every row and
+    column of `INDEX.REGION.GRID.SPACE` borders.
+    """
+    match cfg.INDEX.REGION.TYPE:
+        case 'grid':
+            pass
+        case 'quantile':
+            if len(points):
+                config.gird_border = quantile_border(points, *cfg.INDEX.REGION.GRID.SPACE)
+        case region_type:
+            raise ValueError(f'unknown region type: {region_type}')
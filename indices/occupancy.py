@@ -0,0 +1,101 @@
+import numpy as np
+
+from indices.region import GridRegion
+
+
+class OccupancyTable:
+    """
+    per label summed-area tables over grid cells, one per coarse time bucket, of objects present in cells.
+    A query upper-bounds the number of objects of a label in its region and interval by the rectangle of cells
+    covering its bbox, and is surely empty if any label falls short.
+    Objects co-moving share a time, so the bound is the most objects in a single bucket. Counts are distinct
+    within a batch of added segments. An object counted again in a later batch, or in several cells of a bucket,
+    only loosens the bound.
+    """
+    def __init__(self, bucket):
+        """
+        :param bucket: the number of frames in a time bucket
+        """
+        self.bucket = bucket
+        self.first = 0  # the bucket tables start at
+        self.size = 0  # the number of buckets in tables
+        self.counts = {}  # label -> array of (bucket, row, column)
+        self.sums = {}  # label -> prefix sums of counts over rows and columns, padded by a leading zero row/column
+        self.shape = None
+
+    def add(self, segments, rows, cells):
+        """
+        count objects of segment $rows in their cells
+        :param segments: the segment table
+        :param rows: row ids
+        :param cells: linear grid cell ids of rows, see `GridRegion.index`
+        """
+        if len(rows) == 0:
+            return
+        if self.shape is None:
+            self.shape = GridRegion().shape
+        begins = segments.begins[rows].astype(np.int64)
+        ends = begins + (segments.offsets[rows + 1] - segments.offsets[rows])  # a segment ends at the next head
+        lo, hi = begins // self.bucket, ends // self.bucket
+        spans = hi - lo + 1
+        seg_of = np.repeat(np.arange(len(rows)), spans)
+        buckets = np.repeat(lo, spans) + np.arange(len(seg_of)) - np.repeat(np.cumsum(spans) - spans, spans)
+        labels, cells, oids = segments.labels[rows][seg_of], cells[seg_of], segments.ids[rows][seg_of]
+        present = np.unique(np.rec.fromarrays((labels, buckets, cells, oids)))
+        self._reserve(int(present.f1.min()), int(present.f1.max()))
+
+        cell_num = self.shape[0] * self.shape[1]
+        for label in np.unique(present.f0).tolist():
+            of_label = present[present.f0 == label]
+            counts = self.counts.get(label)
+            if counts is None:
+                counts = self.counts[label] = np.zeros((self.size,) + self.shape, dtype=np.int32)
+                self.sums[label] = np.zeros((self.size, self.shape[0] + 1, self.shape[1] + 1), dtype=np.int32)
+            flat = (of_label.f1 - self.first) * cell_num + of_label.f2
+            np.add.at(counts.reshape(-1), flat, 1)
+            touched = np.unique(of_label.f1 - self.first)
+            self.sums[label][touched, 1:, 1:] = counts[touched].cumsum(axis=1).cumsum(axis=2)
+
+    def upper_bound(self, label, bbox, interval):
+        """
+        :param bbox: (dim0_min, dim0_max, dim1_min, dim1_max)
+        :param interval: [begin, end] of the query, both inclusive
+        :return: the most objects of $label which may be in $bbox at the same time within $interval
+        """
+        if (sums := self.sums.get(label)) is None:
+            return 0
+        lo = max(interval[0] // self.bucket - self.first, 0)
+        hi = min(interval[1] // self.bucket - self.first + 1, len(sums))
+        if lo >= hi:
+            return 0
+        (c0, c1), (r0, r1) = GridRegion().cell_ranges(bbox)
+        if c0 >= c1 or r0 >= r1:
+            return 0
+        sums = sums[lo:hi]
+        return int((sums[:, r1, c1] - sums[:, r0, c1] - sums[:, r1, c0] + sums[:, r0, c0]).max())
+
+    def may_match(self, bbox, labels, interval):
+        """
+        :param labels: {obj_label: count}
+        :return: False if some label surely has fewer objects than wanted, see `obj_verify`
+        """
+        return all(self.upper_bound(label, bbox, interval) >= max(count, 1) for label, count in labels.items())
+
+    def _reserve(self, lo, hi):
+        """
+        grow tables to hold buckets [lo, hi]. Tables grow by at least half at the end, as streaming appends there
+        """
+        if not self.size:
+            self.first, self.size = lo, hi - lo + 1
+            return
+        before = max(self.first - lo, 0)
+        after = max(hi - (self.first + self.size - 1), 0)
+        if after:
+            after = max(after, self.size // 2)
+        if not before and not after:
+            return
+        for tables in (self.counts, self.sums):
+            for label, table in tables.items():
+                tables[label] = np.pad(table, ((before, after), (0, 0), (0, 0)))
+        self.first -= before
+        self.size += before + after
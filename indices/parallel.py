@@ -0,0 +1,112 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from indices.region import GridRegion
+from indices.segments import SegmentTable
+from indices.tempo_spatial import TempoSpatialIndex
+from utilities.config import config
+
+
+def index_table(index: TempoSpatialIndex, table: SegmentTable):
+    """
+    append $table to $index, using a process pool if `INDEX.BUILD.WORKERS` of the index config > 1.
+    """
+    build_cfg = index.cfg.INDEX.BUILD
+    if build_cfg.WORKERS > 1:
+        parallel_add_table(index, table, build_cfg.WORKERS, build_cfg.CELL_SHARDS)
+    else:
+        index.add_table(table)
+
+
+def parallel_add_table(index: TempoSpatialIndex, table: SegmentTable, workers, cell_shards=1):
+    """
+    the same as `index.add_table(table)`, but sub-indices are built in worker processes, one per label
+    or per range of grid cells within a label, and then merged. The segment table is handed to workers
+    through shared memory, and the built sub-indices are pickled back. Thus, the columnar store
+    is preferred as its leaves are plain integers.
+    Labels already in the index are indexed in this process.
+    :param index: the index to extend
+    :param table: segments to add
+    :param workers: process number
+    :param cell_shards: the most shards a label is split into
+    :return: None
+    """
+    first = len(index.segments)
+    index.segments = segments = index.segments.concat(table)
+    rows = np.arange(first, len(segments))
+    labels = segments.labels[rows]
+    known = np.isin(labels, list(index.keys()))
+    index.index_rows(rows[known])
+    rows, labels = rows[~known], labels[~known]
+    if len(rows) == 0:
+        return
+
+    index.version += 1
+    cells = GridRegion().index(segments.points[segments.offsets[rows]])
+    if index.occupancy is not None:
+        index.occupancy.add(segments, rows, cells)
+    shards = sorted(_shards(rows, labels, cells, cell_shards), key=len, reverse=True)
+    with _SharedTable(segments) as shared, ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_index_shard, shared.meta, index.cfg, index.borders, shard) for shard in shards]
+        for future in futures:
+            for label, user_idx in future.result().items():
+                if label in index:
+                    index[label].merge(user_idx)
+                else:
+                    index[label] = user_idx
+
+
+def _shards(rows, labels, cells, cell_shards):
+    order = np.lexsort((cells, labels))
+    rows, labels, cells = rows[order], labels[order], cells[order]
+    label_bounds = np.flatnonzero(np.diff(labels, prepend=labels[0] - 1, append=labels[-1] + 1))
+    for lo, hi in zip(label_bounds[:-1], label_bounds[1:]):
+        label_cells = cells[lo:hi]
+        # evenly split by row count, but never in the middle of a cell
+        cuts = np.searchsorted(label_cells, label_cells[np.linspace(0, hi - lo, cell_shards + 1)[1:-1].astype(int)])
+        yield from (shard for shard in np.split(rows[lo:hi], np.unique(cuts)) if len(shard))
+
+
+def _index_shard(meta, cfg, borders, rows):
+    config.gird_border = borders
+    index = TempoSpatialIndex(cfg)
+    index.occupancy = None  # counted by the parent
+    index.segments = _SharedTable.attach(meta)
+    index.index_rows(rows)
+    return dict(index)
+
+
+class _SharedTable:
+    def __init__(self, table: SegmentTable):
+        self.blocks = []
+        self.meta = {}
+        for f in fields(table):
+            col = getattr(table, f.name)
+            block = shared_memory.SharedMemory(create=True, size=max(col.nbytes, 1))
+            np.ndarray(col.shape, col.dtype, buffer=block.buf)[...] = col
+            self.blocks.append(block)
+            self.meta[f.name] = block.name, col.shape, col.dtype.str
+
+    @staticmethod
+    def attach(meta):
+        cols = {}
+        for name, (block_name, shape, dtype) in meta.items():
+            block = shared_memory.SharedMemory(block_name)
+            cols[name] = np.ndarray(shape, dtype, buffer=block.buf)
+            _attached.append(block)
+        return SegmentTable(**cols)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+# keep blocks attached by a worker alive, as segments of its sub-indices view them
+_attached = []
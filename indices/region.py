@@ -2,6 +2,7 @@ from bisect import bisect_right
 import numpy as np
 
 from utilities.config import config
+from utilities.point_relation import INSIDE, OUTSIDE, rect_relation
 
 
 class GridRegion:
@@ -10,16 +11,60 @@ class GridRegion:
         # this marker marks the starting point of each grid, while $borders
         # contains the end corners, thus removing the last element
         self.terr_marker = [dim[:-1] for dim in self.borders]
-        shape = tuple(map(len, self.terr_marker))
-        self.territory = np.empty(shape[::-1], dtype=object)  # x: column, y: row etc.
+        self.shape = tuple(map(len, self.terr_marker))[::-1]  # x: column, y: row etc.
+        # entries of cells addressed by linear cell ids, see `index`
+        self.cells = [None] * int(np.prod(self.shape))
+        self.occupied = np.zeros(self.shape, dtype=bool)
+        self._cell_ids = np.arange(len(self.cells)).reshape(self.shape)
+
+    @property
+    def territory(self):
+        """
+        entries of cells in the grid's shape, None for empty cells
+        """
+        return np.fromiter(self.cells, dtype=object, count=len(self.cells)).reshape(self.shape)
 
     def add(self, loc, entry):
-        self.territory[self._point2idx(loc)] = entry
+        cell = self._cell_id(loc)
+        self.cells[cell] = entry
+        self.occupied.flat[cell] = entry is not None
+
+    def merge(self, other):
+        if (self.occupied & other.occupied).any():
+            raise ValueError('can not merge grids sharing occupied cells')
+        for cell in np.flatnonzero(other.occupied).tolist():
+            self.cells[cell] = other.cells[cell]
+        self.occupied |= other.occupied
+
+    def __iter__(self):
+        """
+        :return: iterator of (linear cell id, entry) of occupied cells, see `index`
+        """
+        cells = self.cells
+        return ((cell, cells[cell]) for cell in np.flatnonzero(self.occupied).tolist())
+
+    def __len__(self):
+        return int(self.occupied.sum())
+
+    def discard(self, cell):
+        """
+        empty a cell
+        :param cell: linear cell id
+        """
+        self.cells[cell] = None
+        self.occupied.flat[cell] = False
 
     def _point2idx(self, loc):
         return tuple(
             reversed([bisect_right(dim_grid, dim_point) - 1 for dim_grid, dim_point in zip(self.terr_marker, loc)]))
 
+    def _cell_id(self, loc):
+        cell, stride = 0, 1
+        for dim_grid, dim_point in zip(self.terr_marker, loc):
+            cell += (bisect_right(dim_grid, dim_point) - 1) * stride
+            stride *= len(dim_grid)
+        return cell
+
     def _enclose(self, loc):
         for dim_grid, dim_point in zip(self.borders, loc):
             if dim_point < dim_grid[0] or dim_point > dim_grid[-1]:
@@ -29,7 +74,7 @@ class GridRegion:
     def where_contain(self, loc):
         if not self._enclose(loc):
             return
-        return self.territory[self._point2idx(loc)]
+        return self.cells[self._cell_id(loc)]
 
     def index(self, locs):
         mask = np.ones(locs.shape[0], dtype=bool)
@@ -37,22 +82,74 @@ class GridRegion:
         for dim_grid, dim_point in zip(self.borders, loc_t):
             mask &= (dim_point >= dim_grid[0]) | (dim_point <= dim_grid[-1])
         assert mask.all()
+        # row-major linear cell id, the same layout as `territory`
         res = np.zeros(locs.shape[0], dtype=np.int32)
-        for i, (dim_grid, dim_point) in enumerate(zip(self.borders, loc_t)):
-            res += (np.searchsorted(dim_grid, dim_point, side='right') - 1) * (len(dim_grid) if i < 1 else 1)
+        stride = 1
+        for dim_grid, dim_point in zip(self.terr_marker, loc_t):
+            res += (np.searchsorted(dim_grid, dim_point, side='right') - 1) * stride
+            stride *= len(dim_grid)
         return res
 
     def where_intersect(self, bbox):
-        bbox_iter = iter(bbox)
+        bbox_iter = iter(getattr(bbox, 'bbox', bbox))
         region_ls = []
         for dim_grid in self.borders:
             dmin = bisect_right(dim_grid, next(bbox_iter)) - 1
             dmax = bisect_right(dim_grid, next(bbox_iter), dmin)  # the end of a slice is exclusive
             region_ls.append(slice(dmin, dmax))
-        res = self.territory[tuple(reversed(region_ls))]
-        return res[res.nonzero()]
+        region_ls = tuple(reversed(region_ls))
+        return self._entries(self._cell_ids[region_ls][self.occupied[region_ls]])
 
     def perhaps_intersect(self, bbox):
+        """
+        :param bbox: (dim0_min, dim0_max, dim1_min, dim1_max), or a region with `enclose` and `vertices`
+            such as `Polygon`, then cells surely within are found by the region itself
+        :return: (candidate, probation) entries of cells partly and surely within $bbox
+        """
+        candidate, probation = self._intersect_masks(bbox)
+        return self._entries(self._cell_ids[candidate & self.occupied]), \
+            self._entries(self._cell_ids[probation & self.occupied])
+
+    def cells_intersect(self, bbox):
+        """
+        the same as `perhaps_intersect`, but returns linear ids of cells, see `index`
+        :return: (candidate, probation), both are sorted
+        """
+        candidate, probation = self._intersect_masks(bbox)
+        return self._cell_ids[candidate], self._cell_ids[probation]
+
+    def cell_ranges(self, bbox):
+        """
+        :param bbox: (dim0_min, dim0_max, dim1_min, dim1_max)
+        :return: [start, stop) of cells overlapping $bbox in every dimension, clipped to the grid
+        """
+        bbox_iter = iter(bbox)
+        ranges = []
+        for dim_grid in self.borders:
+            start = max(bisect_right(dim_grid, next(bbox_iter)) - 1, 0)
+            stop = min(bisect_right(dim_grid, next(bbox_iter)), len(dim_grid) - 1)
+            ranges.append((start, stop))
+        return ranges
+
+    def _entries(self, cell_ids):
+        cells = self.cells
+        return [cells[cell] for cell in cell_ids.tolist()]
+
+    def _intersect_masks(self, bbox):
+        """
+        :return: (candidate, probation), boolean masks of cells partly and surely within $bbox
+        """
+        candidate_slice, probation_slice = self._intersect_slices(bbox)
+        candidate = np.zeros(self.shape, dtype=bool)
+        candidate[candidate_slice] = True
+        probation = np.zeros(self.shape, dtype=bool)
+        probation[probation_slice] = True
+        candidate &= ~probation
+        return candidate, probation
+
+    def _intersect_slices(self, bbox):
+        if hasattr(bbox, 'enclose'):
+            return self._relation_masks(bbox)
         bbox_iter = iter(bbox)
         probation_slice = []
         candidate_slice = []
@@ -73,17 +170,35 @@ class GridRegion:
                 prob_max = cand_max if border_max == dim_grid[cand_max] - 1 else cand_max - 1
             probation_slice.append(slice(prob_min, prob_max))
             candidate_slice.append(slice(cand_min, cand_max))
-        probation = self.territory[tuple(reversed(probation_slice))]
-        probation = probation[probation.nonzero()]
-        candidate = self.territory[tuple(reversed(candidate_slice))]
-        candidate = candidate[candidate.nonzero()]
-        return np.setdiff1d(candidate, probation, assume_unique=True), probation
+        return tuple(reversed(candidate_slice)), tuple(reversed(probation_slice))
+
+    def _relation_masks(self, region):
+        lo = np.stack(np.meshgrid(*self.terr_marker), axis=-1).reshape(-1, len(self.borders))
+        hi = np.stack(np.meshgrid(*(dim[1:] for dim in self.borders)), axis=-1).reshape(-1, len(self.borders))
+        relation = rect_relation(region, lo, hi).reshape(self.shape)
+        return relation != OUTSIDE, relation == INSIDE
+
+
+def occupancy_stats(counts):
+    """
+    summarise how evenly items spread over cells
+    :param counts: the number of items in every cell, see `TempoSpatialIndex.cell_occupancy`
+    :return: dict of cell number, occupied cell number, item number, the most items in a cell, mean and
+        95th percentile items of occupied cells, and their coefficient of variation
+    """
+    counts = np.ravel(counts)
+    occupied = counts[counts > 0]
+    if not len(occupied):
+        return {'cells': len(counts), 'occupied': 0, 'items': 0, 'max': 0, 'mean': 0., 'p95': 0., 'cv': 0.}
+    return {'cells': len(counts), 'occupied': len(occupied), 'items': occupied.sum().item(),
+            'max': occupied.max().item(), 'mean': occupied.mean().item(),
+            'p95': np.percentile(occupied, 95).item(), 'cv': (occupied.std() / occupied.mean()).item()}
 
 
 class Out3DRegion:
     def __init__(self, data=None):
-        import btree
-        self.duration_index = btree.BtreeMap()
+        from indices.sorted_map import SortedMap
+        self.duration_index = SortedMap()
         if data is not None:
             for key, entry in data:
                 self.add(key, entry)
@@ -0,0 +1,50 @@
+from collections import namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+
+from indices.tempo_spatial import TempoSpatialIndex
+
+Eviction = namedtuple('Eviction', 'horizon segments nbytes')
+
+
+@dataclass(slots=True)
+class RetentionPolicy:
+    """
+    how much history a long-running index keeps.
+    :param max_frames: keep segments ending within the last $max_frames frames
+    :param max_bytes: keep the newest segments whose table fits in $max_bytes. Evicted rows stay in the table
+        until they are compacted, see `TempoSpatialIndex.evict`, so it may take about twice as many bytes.
+    """
+    max_frames: int = None
+    max_bytes: int = None
+
+    def horizon(self, index: TempoSpatialIndex, frame):
+        """
+        :return: segments ending no later than the horizon are expired
+        """
+        horizon = None if self.max_frames is None else frame - self.max_frames
+        segments = index.segments
+        if self.max_bytes is not None and segments.nbytes > self.max_bytes:
+            ends = segments.begins + segments.lens
+            order = np.argsort(ends, kind='stable')
+            row_bytes = sum(getattr(segments, col).itemsize
+                            for col in ('ids', 'begins', 'labels', 'lifelongs', 'offsets'))
+            row_bytes = row_bytes + segments.lens[order] * (segments.points.itemsize * segments.points.shape[1])
+            # bytes still kept if rows up to this one are dropped
+            kept = segments.nbytes - np.cumsum(row_bytes)
+            last = min(np.searchsorted(-kept, -self.max_bytes), len(order) - 1)
+            byte_horizon = int(ends[order[last]])
+            horizon = byte_horizon if horizon is None else max(horizon, byte_horizon)
+        return horizon
+
+    def apply(self, index: TempoSpatialIndex, frame):
+        """
+        evict expired segments from $index.
+        :param index: a tempo-spatial index
+        :param frame: the current frame
+        :return: Eviction(horizon, dropped segment number, reclaimed bytes)
+        """
+        if (horizon := self.horizon(index, frame)) is None:
+            return Eviction(None, 0, 0)
+        return Eviction(horizon, *index.evict(horizon))
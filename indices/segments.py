@@ -0,0 +1,158 @@
+import os
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from utilities.trajectory import TrajectoryIntervalSeg, TrajectorySequenceSeg
+
+
+@dataclass(slots=True)
+class SegmentTable:
+    """
+    columnar storage of trajectory segments. Segment (row) `i` owns points[offsets[i]:offsets[i+1]],
+    and all points live in one shared buffer.
+    """
+    ids: np.ndarray
+    begins: np.ndarray
+    labels: np.ndarray
+    lifelongs: np.ndarray  # length of the whole trajectory the segment is cut from
+    offsets: np.ndarray  # len(offsets) == len(ids) + 1
+    points: np.ndarray
+
+    @classmethod
+    def empty(cls, dim=2):
+        return cls(np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.int16), np.empty(0, np.int32),
+                   np.zeros(1, np.int64), np.empty((0, dim), np.int32))
+
+    @classmethod
+    def from_trajs(cls, trajs, region):
+        """
+        cut trajectories into segments whenever they move to another cell of $region
+        :param trajs: iterable of (tid, start_frame, cls_id, track)
+        :param region: an index with `index` function implemented, mapping points to their cell ids
+        :return: a segment table
+        """
+        ids, begins, labels, lifelongs, offsets, points = [], [], [], [], [], []
+        base = 0
+        for tid, beg, cls_id, track in trajs:
+            pos = region.index(track)
+            break_points = np.flatnonzero(np.diff(pos, prepend=-1))
+            # a segment ends at the first point of the next one,
+            # so the last run which never leaves its cell is not a segment.
+            seg_num = len(break_points) - 1
+            if seg_num < 1:
+                continue
+            ids.append(np.full(seg_num, tid, dtype=np.int64))
+            begins.append(break_points[:-1] + beg)
+            labels.append(np.full(seg_num, cls_id, dtype=np.int16))
+            lifelongs.append(np.full(seg_num, len(track), dtype=np.int32))
+            offsets.append(break_points[:-1] + base)
+            points.append(track[:break_points[-1]])
+            base += break_points[-1]
+        if not ids:
+            return cls.empty()
+        offsets.append([base])
+        return cls(np.concatenate(ids), np.concatenate(begins).astype(np.int32), np.concatenate(labels),
+                   np.concatenate(lifelongs), np.concatenate(offsets).astype(np.int64), np.concatenate(points))
+
+    @classmethod
+    def from_points(cls, oids, fids, points, label_map, region, fps=1):
+        """
+        the vectorised version of `from_trajs`, cutting all trajectories in a single pass.
+        Trajectories are the same as `traj_data` yields given the table is sorted by frame.
+        :param oids: object id of each point
+        :param fids: frame id of each point
+        :param points: coordinates, already scaled
+        :param label_map: map object id to its label
+        :param region: an index with `index` function implemented, mapping points to their cell ids
+        :param fps: keep one point every $fps frames of an object
+        :return: a segment table
+        """
+        if len(oids) == 0:
+            return cls.empty(points.shape[1])
+        order = np.lexsort((fids, oids))
+        oids, fids, points = oids[order], fids[order], points[order]
+        new_traj = np.empty(len(oids), dtype=bool)
+        new_traj[0] = True
+        np.not_equal(oids[1:], oids[:-1], out=new_traj[1:])
+        traj_starts = np.flatnonzero(new_traj)
+        traj_of = np.cumsum(new_traj) - 1
+        step = np.arange(len(oids)) - traj_starts[traj_of]
+        keep = step % fps == 0
+        traj_of, step, points = traj_of[keep], step[keep] // fps, points[keep]
+        lifelongs = np.bincount(traj_of, minlength=len(traj_starts))
+
+        cells = region.index(points)
+        new_run = step == 0
+        new_run[1:] |= cells[1:] != cells[:-1]
+        run_starts = np.flatnonzero(new_run)
+        run_traj = traj_of[run_starts]
+        # the last run of a trajectory never leaves its cell, so it is not a segment. see `from_trajs`
+        is_seg = np.append(run_traj[1:] == run_traj[:-1], False)
+        seg_starts = run_starts[is_seg]
+        seg_ends = np.append(run_starts[1:], len(points))[is_seg]
+        seg_traj = traj_of[seg_starts]
+
+        covered = np.zeros(len(points) + 1, dtype=np.int32)
+        np.add.at(covered, seg_starts, 1)
+        np.add.at(covered, seg_ends, -1)
+        offsets = np.zeros(len(seg_starts) + 1, dtype=np.int64)
+        np.cumsum(seg_ends - seg_starts, out=offsets[1:])
+        traj_ids = oids[traj_starts]
+        traj_labels = np.fromiter((label_map[tid] for tid in traj_ids.tolist()), np.int16, len(traj_ids))
+        begins = fids[traj_starts][seg_traj] + step[seg_starts]
+        return cls(traj_ids[seg_traj].astype(np.int64), begins.astype(np.int32), traj_labels[seg_traj],
+                   lifelongs[seg_traj].astype(np.int32), offsets, points[np.cumsum(covered[:-1]) > 0])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def lens(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, f.name).nbytes for f in fields(self))
+
+    def points_of(self, row):
+        return self.points[self.offsets[row]:self.offsets[row + 1]]
+
+    def sequence_seg(self, row):
+        return TrajectorySequenceSeg(int(self.ids[row]), int(self.begins[row]), int(self.labels[row]),
+                                     self.points_of(row))
+
+    def interval_seg(self, row):
+        return TrajectoryIntervalSeg(int(self.ids[row]), int(self.begins[row]), int(self.labels[row]),
+                                     int(self.offsets[row + 1] - self.offsets[row]))
+
+    def take(self, mask):
+        """
+        :param mask: boolean array, which rows to keep
+        :return: a new table of kept rows
+        """
+        lens = self.lens[mask]
+        offsets = np.zeros(len(lens) + 1, dtype=np.int64)
+        np.cumsum(lens, out=offsets[1:])
+        point_idx = np.repeat(self.offsets[:-1][mask] - offsets[:-1], lens) + np.arange(offsets[-1])
+        return type(self)(self.ids[mask], self.begins[mask], self.labels[mask], self.lifelongs[mask], offsets,
+                          self.points[point_idx])
+
+    def concat(self, other):
+        if len(self) == 0:
+            return other
+        offsets = np.concatenate((self.offsets[:-1], other.offsets + self.offsets[-1]))
+        return type(self)(*(np.concatenate((getattr(self, f.name), getattr(other, f.name)))
+                            if f.name != 'offsets' else offsets for f in fields(self)))
+
+    def save(self, path):
+        """
+        write every column to `$path/<column>.npy` so that they can be memory-mapped back.
+        """
+        os.makedirs(path, exist_ok=True)
+        for f in fields(self):
+            np.save(os.path.join(path, f'{f.name}.npy'), getattr(self, f.name))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        return cls(*(np.load(os.path.join(path, f'{f.name}.npy'), mmap_mode=mmap_mode) for f in fields(cls)))
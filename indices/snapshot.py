@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+
+from indices.parallel import index_table
+from indices.segments import SegmentTable
+from indices.tempo_spatial import TempoSpatialIndex
+from utilities.config import config
+
+SNAPSHOT_VERSION = 2
+
+
+def save_index(index: TempoSpatialIndex, path):
+    """
+    persist a tempo-spatial index as a directory of `.npy` columns:
+    the segment table, one file per grid border dimension, the layout of indexed rows,
+    see `TempoSpatialIndex.layout`, and a small `meta.json`.
+    :param index: index returned by `build_tempo_spatial_index`
+    :param path: snapshot directory, created if missing
+    :return: None
+    """
+    index.segments.save(path)
+    for dim, border in enumerate(index.borders):
+        np.save(os.path.join(path, f'border{dim}.npy'), np.asarray(border))
+    rows, cells = index.layout(index.live_rows())
+    np.save(os.path.join(path, 'layout_rows.npy'), rows)
+    np.save(os.path.join(path, 'layout_cells.npy'), cells)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'segments': len(index.segments),
+                   'border_dims': len(index.borders)}, f)
+
+
+def load_index(path, cfg, mmap_mode='r'):
+    """
+    rebuild a tempo-spatial index from a snapshot. Columns are memory-mapped,
+    thus points are only read when a query touches them.
+    Rows are indexed in their saved layout, so neither their cells nor their order are computed again.
+    Most of the time still goes to creating inner indices of cells and leaves, and segment objects per row
+    with the object store, see `benchmark.py --snapshot`.
+    Snapshots of version 1 have no layout and are indexed as a new table.
+    Note that `config.gird_border` is replaced by the borders in the snapshot.
+    :param path: snapshot directory written by `save_index`
+    :param cfg: index config, which may differ from the one used when saving
+    :param mmap_mode: passed to `np.load`, None to read everything into memory
+    :return: the index
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta['version'] not in (1, SNAPSHOT_VERSION):
+        raise ValueError(f'unsupported snapshot version: {meta["version"]}')
+    config.gird_border = [np.load(os.path.join(path, f'border{dim}.npy')).tolist()
+                          for dim in range(meta['border_dims'])]
+    index = TempoSpatialIndex(cfg)
+    table = SegmentTable.load(path, mmap_mode)
+    if meta['version'] == 1:
+        index_table(index, table)
+    else:
+        index.segments = table
+        rows = np.load(os.path.join(path, 'layout_rows.npy'))
+        # rows out of the layout were evicted before saving
+        index.expired = np.ones(len(table), dtype=bool)
+        index.expired[rows] = False
+        index.index_layout(rows, np.load(os.path.join(path, 'layout_cells.npy')))
+    return index
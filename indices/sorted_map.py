@@ -0,0 +1,113 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+class SortedMap:
+    """
+    an ordered map backed by a sorted list of keys and a list of values in the same order.
+    Keys are found by binary search, so a range query is a slice of values.
+    Inserting a key is linear, thus build it by `extend` in bulk when possible.
+    """
+    unique = True
+
+    def __init__(self):
+        self._keys = []
+        self._values = []
+
+    def __iter__(self):
+        """
+        :return: iterator of (key, value) in key order
+        """
+        return zip(self._keys, self._values)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key, value):
+        if self.unique:
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                self._values[i] = value
+                return
+        else:
+            i = bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._values.insert(i, value)
+
+    def extend(self, keys, values, ordered=False):
+        """
+        add many entries at once, merging them by a stable sort unless they are appended after all keys.
+        Values of equal keys keep their insertion order.
+        :param keys: integer keys, array-like
+        :param values: values of keys, in the same order
+        :param ordered: $keys are known to be sorted, and distinct for unique maps, so that they are appended
+            without checking them if they follow all keys
+        """
+        if ordered and len(keys) and (not self._keys or self._keys[-1] < keys[0]
+                                      or not self.unique and self._keys[-1] == keys[0]):
+            self._keys.extend(keys.tolist() if isinstance(keys, np.ndarray) else keys)
+            self._values.extend(values.tolist() if isinstance(values, np.ndarray) else values)
+            return
+        keys = np.asarray(keys, dtype=np.int64)
+        values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        if not len(keys):
+            return
+        steps = np.diff(keys, prepend=self._keys[-1:])
+        if (steps > 0).all() or not self.unique and (steps >= 0).all():  # append only
+            self._keys.extend(keys.tolist())
+            self._values.extend(values)
+            return
+        keys = np.concatenate((np.array(self._keys, dtype=np.int64), keys))
+        values = self._values + values
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        if self.unique:  # the last value of a key wins, as `add` does
+            last = np.append(keys[1:] != keys[:-1], True)
+            order, keys = order[last], keys[last]
+        self._keys = keys.tolist()
+        self._values = [values[i] for i in order.tolist()]
+
+    def merge(self, other):
+        self.extend(other._keys, other._values)
+
+    def discard(self, key):
+        """
+        remove $key and its values if present
+        """
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        del self._keys[lo:hi], self._values[lo:hi]
+
+    def drop_through(self, key):
+        """
+        remove entries whose keys are no more than $key
+        :return: the number of removed values
+        """
+        end = bisect_right(self._keys, key)
+        del self._keys[:end], self._values[:end]
+        return end
+
+    def where_contain(self, key):
+        """
+        :return: the value of $key, the first one for multimaps, or None if missing
+        """
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._values[i]
+
+    def where_intersect(self, bounds):
+        """
+        :param bounds: (lo, hi), the half-open key range [lo, hi)
+        :return: list of values whose keys are within $bounds, in key order
+        """
+        keys = self._keys
+        lo = bisect_left(keys, bounds[0])
+        return self._values[lo:bisect_left(keys, bounds[1], lo)]
+
+
+class SortedMultiMap(SortedMap):
+    """
+    the same as `SortedMap`, but a key may hold many values
+    """
+    unique = False
@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from itertools import chain
+from threading import RLock
+
+import numpy as np
+
+from indices.region import GridRegion
+from indices.retention import RetentionPolicy
+from indices.segments import SegmentTable
+from indices.tempo_spatial import TempoSpatialIndex
+
+
+@dataclass(slots=True)
+class OpenTrack:
+    tid: int
+    label: int
+    start_frame: int
+    last_frame: int
+    seen: int = 0
+    points: list = field(default_factory=list)
+
+
+class StreamingIndex:
+    """
+    ingest trajectory points frame by frame into a tempo-spatial index.
+    Since segments are keyed by the lifelong of their trajectories, an object's points are buffered
+    in its open track until it is closed, explicitly or after `patience` frames without a point,
+    and then all its segments are indexed at once.
+    Frames before `watermark` are final: queries whose interval ends before it return the same result
+    as an index built from the whole data, and they can run while other threads keep appending.
+    A query is only held back by tracks it may find, see `query_watermark`, so a long-lived object
+    does not block queries of other labels or of shorter durations.
+    """
+    def __init__(self, index: TempoSpatialIndex, fps=1, patience=30, flush_size=1024,
+                 retention: RetentionPolicy = None):
+        """
+        :param index: the index to ingest into, may be empty
+        :param fps: keep one point every $fps points of an object, as `traj_data` does
+        :param patience: close an object if no point of it arrives in this many frames.
+            Points of a closed object that shows up again start a new trajectory with the same id.
+        :param flush_size: index closed tracks once there are this many of them
+        :param retention: if given, expired segments are evicted whenever closed tracks are flushed
+        """
+        self.index = index
+        self.fps = fps
+        self.patience = patience
+        self.flush_size = flush_size
+        self.retention = retention
+        self.open_tracks: dict[int, OpenTrack] = {}
+        self.closed: list[OpenTrack] = []
+        self.frame = None
+        # ingestion only touches buffers, so it waits for queries only when flushing
+        self._buffer_lock = RLock()
+        self._index_lock = RLock()
+
+    @property
+    def watermark(self):
+        if self.frame is None:
+            return None
+        return min((track.start_frame for track in self.open_tracks.values()), default=self.frame + 1)
+
+    def query_watermark(self, labels, duration_range):
+        """
+        the watermark of a query, not before `watermark`.
+        Segments are found by the lifelong of their trajectories, which is in [duration_range[0], duration_range[1]),
+        so tracks of other labels, or already as long as `duration_range[1]`, never change the results.
+        Closed tracks not indexed yet hold the query back as open ones.
+        """
+        with self._buffer_lock:
+            if self.frame is None:
+                return None
+            return min((track.start_frame for track in chain(self.open_tracks.values(), self.closed)
+                        if track.label in labels and len(track.points) < duration_range[1]),
+                       default=self.frame + 1)
+
+    def append(self, fid, oids, labels, points):
+        """
+        add points of a new frame.
+        :param fid: frame id, not less than the last one
+        :param oids: object ids
+        :param labels: object labels, only used when an object shows up for the first time
+        :param points: coordinates of objects, already scaled
+        :return: None
+        """
+        with self._buffer_lock:
+            if self.frame is not None and fid < self.frame:
+                raise ValueError(f'frame {fid} arrives after frame {self.frame}')
+            self.frame = fid
+            open_tracks = self.open_tracks
+            for tid, label, point in zip(np.asarray(oids).tolist(), np.asarray(labels).tolist(), points):
+                if (track := open_tracks.get(tid)) is None:
+                    track = open_tracks[tid] = OpenTrack(tid, label, fid, fid)
+                if track.seen % self.fps == 0:
+                    track.points.append(point)
+                track.seen += 1
+                track.last_frame = fid
+            expired = [tid for tid, track in open_tracks.items() if fid - track.last_frame >= self.patience]
+        self.close(expired)
+
+    def close(self, oids=None):
+        """
+        close objects, all open objects if $oids is None.
+        """
+        with self._buffer_lock:
+            oids = list(self.open_tracks) if oids is None else oids
+            self.closed.extend(self.open_tracks.pop(tid) for tid in oids)
+            to_flush = len(self.closed) >= self.flush_size
+        if to_flush:
+            self.flush()
+
+    def flush(self):
+        """
+        index all closed tracks.
+        :return: the watermark, all frames before which are in the index now
+        """
+        # always take the index lock first
+        with self._index_lock:
+            with self._buffer_lock:
+                closed, self.closed = self.closed, []
+                watermark = self.watermark
+            if closed:
+                self.index.add_table(SegmentTable.from_trajs(
+                    ((track.tid, track.start_frame, track.label, np.asarray(track.points)) for track in closed),
+                    GridRegion()))
+                if self.retention is not None:
+                    self.retention.apply(self.index, self.frame)
+            return watermark
+
+    def query(self, search, region, labels, duration_range, interval):
+        """
+        run a search method over final frames.
+        :param search: `one_pass_search`, `base_search` etc.
+        :return: search results as a list
+        """
+        with self._index_lock:
+            self.flush()
+            watermark = self.query_watermark(labels, duration_range)
+            if watermark is None or interval[1] >= watermark:
+                raise ValueError(f'interval {interval} is not before the watermark {watermark}')
+            return list(search(self.index, region, labels, duration_range, interval))
@@ -0,0 +1,220 @@
+from collections import defaultdict
+
+import numpy as np
+
+from indices.occupancy import OccupancyTable
+from indices.region import GridRegion
+from indices.segments import SegmentTable
+from indices.user_indices import get_user_indices
+from utilities.config import config
+
+
+class TempoSpatialIndex(defaultdict):
+    """
+    label -> user index. It also keeps the segments table its entries are cut from
+    and the grid borders the spatial level is built on.
+    If `columnar`, entries are row ids of `segments` rather than segment objects.
+    `occupancy`, if enabled, counts objects in cells and time buckets to reject queries early.
+    `expired` marks rows of `segments` evicted from the index but not compacted yet, see `evict`.
+    `version` changes whenever entries are added or removed.
+    """
+    def __init__(self, cfg):
+        super().__init__(get_user_indices(cfg))
+        self.cfg = cfg
+        self.borders = config.gird_border
+        self.segments = SegmentTable.empty()
+        self.columnar = cfg.INDEX.STORE == 'columnar'
+        self.occupancy = self._new_occupancy()
+        self.expired = np.zeros(0, dtype=bool)  # may be shorter than `segments`, whose later rows are not expired
+        self.version = 0
+
+    def __reduce__(self):
+        """
+        pickle the segment table and the layout of indexed rows, whose inner indices are built again when
+        unpickled, see `index_layout`. Note that unpickling sets `config.gird_border` to the borders of the index.
+        """
+        rows, cells = self.layout(self.live_rows())
+        return _restore, (self.cfg, self.borders, self.segments, self._expired_rows(), rows, cells)
+
+    def _new_occupancy(self):
+        bucket = self.cfg.INDEX.OCCUPANCY.BUCKET
+        return OccupancyTable(bucket) if bucket > 0 else None
+
+    def may_match(self, region, labels, interval):
+        """
+        :param region: query region, only its bbox is considered
+        :param labels: {obj_label: count}
+        :return: False if the query is surely empty by `occupancy`
+        """
+        return self.occupancy is None or self.occupancy.may_match(region.bbox, labels, interval)
+
+    def add_table(self, table: SegmentTable):
+        """
+        append segments and index them.
+        """
+        first = len(self.segments)
+        self.segments = self.segments.concat(table)
+        self.index_rows(np.arange(first, len(self.segments)))
+
+    def evict(self, horizon):
+        """
+        drop segments ending no later than $horizon. Their entries are removed in place, which visits every leaf
+        but builds none, and emptied leaves and grid cells are removed as well. `occupancy` still counts them,
+        which only loosens its bound.
+        Their rows stay in `segments` as `expired` until they are as many as the others, and then the table is
+        compacted, see `compact`. Thus, the O(index) rebuild happens once per as many evicted rows as are kept.
+        :param horizon: end time (exclusive) of segments to drop
+        :return: (dropped segment number, reclaimed bytes of the segment table)
+        """
+        segments = self.segments
+        expired = self._expired_rows()
+        ending = segments.begins + segments.lens <= horizon
+        dropped = int(np.count_nonzero(ending & ~expired))
+        if not dropped:
+            return 0, 0
+        self.version += 1
+        self.expired = expired | ending
+        for label in list(self):
+            if not _drop_ending_by(self[label], horizon):
+                del self[label]
+        if 2 * np.count_nonzero(self.expired) >= len(segments):
+            return dropped, self.compact()
+        return dropped, 0
+
+    def compact(self):
+        """
+        remove `expired` rows from `segments`. Row ids change, so the remaining rows are indexed again.
+        :return: reclaimed bytes of the segment table
+        """
+        expired = self._expired_rows()
+        if not expired.any():
+            return 0
+        segments = self.segments
+        self.segments = segments.take(~expired)
+        self.expired = np.zeros(0, dtype=bool)
+        self.version += 1
+        self.clear()
+        self.occupancy = self._new_occupancy()
+        self.index_rows(np.arange(len(self.segments)))
+        return segments.nbytes - self.segments.nbytes
+
+    def live_rows(self):
+        """
+        :return: ids of rows of `segments` in the index, which are not `expired`
+        """
+        return np.flatnonzero(~self._expired_rows())
+
+    def _expired_rows(self):
+        expired = np.zeros(len(self.segments), dtype=bool)
+        expired[:len(self.expired)] = self.expired
+        return expired
+
+    def cell_occupancy(self):
+        """
+        :return: the number of segments starting in every grid cell, in the shape of the grid
+        """
+        region = GridRegion()
+        rows = self.live_rows()
+        cells = region.index(self.segments.points[self.segments.offsets[rows]]) if len(rows) else []
+        return np.bincount(cells, minlength=len(region.cells)).reshape(region.shape)
+
+    def index_rows(self, rows):
+        """
+        index rows of `segments`. Rows are sorted by (label, cell, lifelong, duration, begin) first,
+        so that every inner index is looked up once per run rather than once per segment.
+        """
+        if len(rows) == 0:
+            return
+        self.index_layout(*self.layout(rows))
+
+    def layout(self, rows):
+        """
+        :param rows: row ids of `segments`
+        :return: (rows, cells): $rows in the order they are indexed, see `index_rows`, and their linear grid cells
+        """
+        segments = self.segments
+        cells = GridRegion().index(segments.points[segments.offsets[rows]])
+        order = np.lexsort((segments.begins[rows], segments.offsets[rows + 1] - segments.offsets[rows],
+                            segments.lifelongs[rows], cells, segments.labels[rows]))
+        return rows[order], cells[order]
+
+    def index_layout(self, rows, cells):
+        """
+        index rows of `segments` given in the order of `layout`, such as those saved by `save_index`.
+        :param rows: row ids
+        :param cells: linear grid cells of rows
+        """
+        if len(rows) == 0:
+            return
+        self.version += 1
+        segments = self.segments
+        if self.occupancy is not None:
+            self.occupancy.add(segments, rows, cells)
+        labels, lifelongs, lens, begins = (segments.labels[rows], segments.lifelongs[rows],
+                                           segments.offsets[rows + 1] - segments.offsets[rows], segments.begins[rows])
+
+        new_label = _changes(labels)
+        new_cell = new_label | _changes(cells) | _changes(lifelongs)
+        new_leaf = new_cell | _changes(lens)
+        entries = rows if self.columnar else [segments.sequence_seg(row) for row in rows.tolist()]
+        # read leaf keys at once, points may be memory-mapped
+        leaf_starts = np.flatnonzero(new_leaf)
+        heads = iter(np.asarray(segments.points[segments.offsets[rows[new_cell]]]).tolist())
+        user_idx = tempo_idx = None
+        for lo, hi, label, lifelong, length, label_changes, cell_changes in zip(
+                leaf_starts.tolist(), np.append(leaf_starts[1:], len(rows)).tolist(), labels[leaf_starts].tolist(),
+                lifelongs[leaf_starts].tolist(), lens[leaf_starts].tolist(), new_label[leaf_starts].tolist(),
+                new_cell[leaf_starts].tolist()):
+            if label_changes:
+                user_idx = self[label]
+            if cell_changes:
+                tempo_idx = user_idx.inner((next(heads), lifelong))
+            _bulk_add(tempo_idx.inner(length), begins[lo:hi], entries[lo:hi])
+
+
+def _restore(cfg, borders, segments, expired, rows, cells):
+    config.gird_border = borders
+    index = TempoSpatialIndex(cfg)
+    index.segments, index.expired = segments, expired
+    index.index_layout(rows, cells)
+    return index
+
+
+def _drop_ending_by(user_idx, horizon):
+    """
+    remove entries of segments ending no later than $horizon from a user index in place. Its levels are
+    grid cells, lifelongs, and then durations and begins, or an `IntervalIndex`, see `get_user_indices`.
+    :return: the number of cells left
+    """
+    regions = user_idx.outer.outer
+    for cell, by_lifelong in list(regions):
+        for lifelong, tempo_idx in list(by_lifelong):
+            if (drop := getattr(tempo_idx, 'drop_ending_by', None)) is not None:
+                drop(horizon)
+            else:
+                by_len = tempo_idx.outer
+                for length, by_begin in list(by_len):
+                    # a segment lasting $length ends by the horizon if it begins by horizon - length
+                    by_begin.drop_through(horizon - length)
+                    if not len(by_begin):
+                        by_len.discard(length)
+            if not len(tempo_idx):
+                by_lifelong.discard(lifelong)
+        if not len(by_lifelong):
+            regions.discard(cell)
+    return len(regions)
+
+
+def _changes(col):
+    res = np.empty(len(col), dtype=bool)
+    res[0] = True
+    np.not_equal(col[1:], col[:-1], out=res[1:])
+    return res
+
+
+def _bulk_add(idx, keys, entries):
+    if (extend := getattr(idx, 'extend', None)) is not None:
+        extend(keys, entries, ordered=True)
+    else:
+        for key, entry in zip(keys.tolist(), entries.tolist() if isinstance(entries, np.ndarray) else entries):
+            idx.add(key, entry)
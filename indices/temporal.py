@@ -1,16 +1,17 @@
-import btree
+import numpy as np
 
 from .index_interface import Index
+from .sorted_map import SortedMap, SortedMultiMap
 
 
 class Tempo2DIndex(Index):
     def __init__(self):
-        self._store = btree.BtreeMap()
+        self._store = SortedMap()
 
     def add(self, key, entry):
         if (begin_idx := self._store.where_contain(key.duration)) is None:
-            begin_idx = btree.BtreeMultiMap()
-            self._store.add(begin_idx)
+            begin_idx = SortedMultiMap()
+            self._store.add(key.duration, begin_idx)
         begin_idx.add(key.begin, entry)
 
     def where_contain(self, key):
@@ -19,3 +20,188 @@ class Tempo2DIndex(Index):
     def where_intersect(self, bbox):
         for beg_idx in self._store.where_intersect(bbox[:2]):
             yield from beg_idx.where_intersect(bbox[2:])
+
+
+class IntervalIndex:
+    """
+    segments keyed by (duration, begin) like `Tempo2DIdx`, but searched as intervals [begin, begin + duration)
+    in begin order with a centred interval tree for segments covering a time, so finding the k segments
+    overlapping a query costs O(log n + k) rather than a range search per distinct duration.
+    Segments are buffered when added and the tree is rebuilt by the next search.
+    Found segments are ordered by (begin, duration), then by insertion.
+    """
+    leaf_size = 32  # nodes with fewer segments are scanned at once
+
+    def __init__(self, intersect_strategy='IntervalInnerAll'):
+        """
+        :param intersect_strategy: 'IntervalInnerAll' returns found entries as one group,
+            the same as an item of 'FuzzyInnerAll', 'IntervalSearch' returns them as they are
+        """
+        self.grouped = intersect_strategy == 'IntervalInnerAll'
+        self._begins = np.empty(0, dtype=np.int64)
+        self._lens = np.empty(0, dtype=np.int64)
+        self._entries = np.empty(0, dtype=np.int64)  # integers of the columnar store or objects
+        self._pending = [], [], []  # begins, durations, entries added since the tree was built
+        self._nodes = None
+        self._spans = None  # (begin, end, entry) of segments if they are no more than a leaf holds
+
+    def inner(self, duration):
+        """
+        :return: an index taking entries of segments lasting $duration, keyed by begin
+        """
+        return _DurationView(self, duration)
+
+    def add(self, key, entry):
+        self.extend([key[1]], [key[0]], [entry])
+
+    def extend(self, begins, durations, entries):
+        begins_, durations_, entries_ = self._pending
+        begins_.append(np.asarray(begins, dtype=np.int64))
+        durations_.append(np.broadcast_to(np.asarray(durations, dtype=np.int64), begins_[-1].shape))
+        entries_.append(entries if isinstance(entries, np.ndarray) else _objects(entries))
+        self._nodes = None
+
+    def merge(self, other):
+        other._build()
+        self.extend(other._begins, other._lens, other._entries)
+
+    def __len__(self):
+        return len(self._entries) + sum(map(len, self._pending[0]))
+
+    def drop_ending_by(self, horizon):
+        """
+        remove segments ending no later than $horizon, the tree is built again by the next search
+        :return: the number of removed segments
+        """
+        self._build()
+        keep = self._begins + self._lens > horizon
+        if keep.all():
+            return 0
+        self._begins, self._lens, self._entries = self._begins[keep], self._lens[keep], self._entries[keep]
+        self._nodes = None
+        return len(keep) - len(self._entries)
+
+    def where_contain(self, key):
+        self._build()
+        duration, begin = key
+        lo, hi = np.searchsorted(self._begins, [begin, begin + 1])
+        for pos in range(lo, hi):
+            if self._lens[pos] == duration:
+                return self._entries[pos]
+
+    def __iter__(self):
+        """
+        :return: iterator of (duration, begin, entry) in the order segments are found
+        """
+        self._build()
+        return zip(self._lens.tolist(), self._begins.tolist(), self._entries.tolist())
+
+    def where_intersect(self, interval):
+        """
+        :param interval: (lo, hi), segments overlapping [lo, hi) are found
+        :return: a list of entries, or a list holding them as one group if there is any and `grouped`
+        """
+        self._build()
+        lo, hi = interval
+        if self._spans is not None:  # few segments, which are scanned in order
+            found = [entry for begin, end, entry in self._spans if begin < hi and end > lo]
+        else:
+            found = self._entries[self._search(lo, hi)].tolist()
+        return [found] if self.grouped and found else found
+
+    def _search(self, lo, hi):
+        """
+        :return: positions of segments overlapping [lo, hi), ascending. Segments beginning in [lo, hi) are
+            a range of positions, so the tree is only searched for segments covering lo.
+        """
+        first, last = self._begins.searchsorted([lo, hi])
+        stabbed = self._stab(lo)
+        return np.concatenate((stabbed, np.arange(first, max(first, last)))) if len(stabbed) else \
+            np.arange(first, max(first, last))
+
+    def _stab(self, point):
+        """
+        :return: positions of segments beginning before $point and ending after it, ascending
+        """
+        found = []
+        node = 0
+        while node is not None:
+            centre, left, right, by_begin, begin_keys, by_end, end_keys = self._nodes[node]
+            if centre is None:  # a leaf
+                found.append(by_begin[(self._begins[by_begin] < point) &
+                                      (self._begins[by_begin] + self._lens[by_begin] > point)])
+                break
+            if point <= centre:  # every segment of the node ends after centre
+                found.append(by_begin[:np.searchsorted(begin_keys, point)])
+                node = left if point < centre else None
+            else:  # every segment of the node begins by centre
+                found.append(by_end[:np.searchsorted(end_keys, -point)])  # $end_keys are descending ends negated
+                node = right
+        return np.sort(np.concatenate(found))
+
+    def _build(self):
+        if self._nodes is not None:
+            return
+        begins_, durations_, entries_ = self._pending
+        if begins_:
+            begins = np.concatenate([self._begins] + begins_)
+            lens = np.concatenate([self._lens] + durations_)
+            entries = [self._entries] + entries_
+            entries = np.concatenate(entries) if all(col.dtype != object for col in entries) else \
+                np.concatenate([col.astype(object) for col in entries])
+            order = np.lexsort((lens, begins))  # stable, so ties keep insertion order
+            self._begins, self._lens, self._entries = begins[order], lens[order], entries[order]
+            self._pending = [], [], []
+        self._nodes = []
+        if len(self._entries) <= self.leaf_size:
+            self._spans = list(zip(self._begins.tolist(), (self._begins + self._lens).tolist(),
+                                   self._entries.tolist()))
+        else:
+            self._spans = None
+            self._build_node(np.arange(len(self._entries)))
+
+    def _build_node(self, positions):
+        """
+        :param positions: positions of segments in this subtree, ascending
+        :return: the node id, a node is (centre, left, right, positions by begin, their begins,
+            positions by descending end, their ends negated), whose centre is None for leaves
+        """
+        node = len(self._nodes)
+        self._nodes.append(None)
+        begins = self._begins[positions]
+        if len(positions) <= self.leaf_size:
+            self._nodes[node] = None, None, None, positions, None, None, None
+            return node
+        ends = begins + self._lens[positions]
+        centre = int(begins[len(begins) // 2])
+        left, mid = ends <= centre, begins <= centre
+        here = mid & ~left
+        by_end = positions[here][np.argsort(-ends[here], kind='stable')]
+        left, right = self._build_node(positions[left]), self._build_node(positions[~mid])
+        self._nodes[node] = (centre, left, right, positions[here], begins[here], by_end,
+                             -(self._begins[by_end] + self._lens[by_end]))
+        return node
+
+
+def _objects(entries):
+    """
+    :return: an object array of $entries, which are never unpacked even if they are sequences
+    """
+    entries = list(entries)
+    return np.fromiter(entries, dtype=object, count=len(entries))
+
+
+class _DurationView:
+    """
+    entries of an `IntervalIndex` lasting the same duration, see `IntervalIndex.inner`
+    """
+    def __init__(self, index, duration):
+        self.index = index
+        self.duration = duration
+
+    def add(self, begin, entry):
+        self.index.extend([begin], [self.duration], [entry])
+
+    def extend(self, begins, entries, ordered=False):
+        # segments are sorted when the tree is built, whatever order they come in
+        self.index.extend(begins, self.duration, entries)
@@ -7,15 +7,38 @@ class TwoLevelMergeIndex:
         self._inner_cls = inner_cls
         self.where_intersect = partial(strategies[intersect_strategy], self._outer)
 
+    def __len__(self):
+        return len(self._outer)
+
+    @property
+    def outer(self):
+        """
+        the top level index, whose values are inner indices
+        """
+        return self._outer
+
     def add(self, key, entry) -> None:
-        if (inner_idx := self._outer.where_contain(key[0])) is None:
+        self.inner(key[0]).add(key[1], entry)
+
+    def inner(self, outer_key):
+        """
+        :param outer_key: key of the top level index.
+        :return: the inner index under $outer_key, created if missing.
+        """
+        if (inner_idx := self._outer.where_contain(outer_key)) is None:
             inner_idx = self._inner_cls()
-            self._outer.add(key[0], inner_idx)
-        inner_idx.add(key[1], entry)
+            self._outer.add(outer_key, inner_idx)
+        return inner_idx
 
     def where_contain(self, key):
         return (inner := self._outer.where_contain(key[0])) and inner.where_contain(key[1])
 
+    def merge(self, other) -> None:
+        """
+        move entries of $other into this index. Their top level keys should not overlap.
+        """
+        self._outer.merge(other._outer)
+
 
 def intersect_return_entry(outer_idx, bboxes):
     """
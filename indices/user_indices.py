@@ -1,23 +1,26 @@
 from functools import partial
 
-import btree
-
 from .region import GridRegion, unsure
+from .sorted_map import SortedMap, SortedMultiMap
+from .temporal import IntervalIndex
 from .two_level_merge_index import TwoLevelMergeIndex
 
 # Here we need duration to deduct the correct beginning of a segment
 # overlapping within the searching interval. Therefore, fuzzy search is needed.
 # key: (duration, begin)
-# Tempo2DIdx = partial(TwoLevelMergeIndex, btree.BtreeMap, btree.BtreeMultiMap, 'FuzzyInnerAll')
+# Tempo2DIdx = partial(TwoLevelMergeIndex, SortedMap, SortedMultiMap, 'FuzzyInnerAll')
 # key: ((x, y), duration)
-# Out3DRegion = partial(TwoLevelMergeIndex, unsure(GridRegion), btree.BtreeMap, 'NotSureSearch')
+# Out3DRegion = partial(TwoLevelMergeIndex, unsure(GridRegion), SortedMap, 'NotSureSearch')
 # key:(((x, y), duration), (duration, begin))
 # UserIdx = partial(TwoLevelMergeIndex, Out3DRegion, Tempo2DIdx, 'NotSureSearch')
 
 
 def get_user_indices(cfg):
-    Tempo2DIdx = partial(TwoLevelMergeIndex, btree.BtreeMap, btree.BtreeMultiMap, cfg.INDEX.SEARCH_METHOD.TEMPO)
+    if cfg.INDEX.SEARCH_METHOD.TEMPO.startswith('Interval'):  # 'IntervalInnerAll' or 'IntervalSearch'
+        Tempo2DIdx = partial(IntervalIndex, cfg.INDEX.SEARCH_METHOD.TEMPO)
+    else:
+        Tempo2DIdx = partial(TwoLevelMergeIndex, SortedMap, SortedMultiMap, cfg.INDEX.SEARCH_METHOD.TEMPO)
 
     Out3DRegion = partial(TwoLevelMergeIndex, GridRegion if cfg.INDEX.REGION.COARSE else unsure(GridRegion),
-                          btree.BtreeMap, cfg.INDEX.SEARCH_METHOD.REGION)
+                          SortedMap, cfg.INDEX.SEARCH_METHOD.REGION)
     return partial(TwoLevelMergeIndex, Out3DRegion, Tempo2DIdx, cfg.INDEX.SEARCH_METHOD.USER)
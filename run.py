@@ -1,26 +1,36 @@
+import os
 from itertools import takewhile
 from time import perf_counter as now
 
 from configs import cfg
-from indices.builder import build_tempo_spatial_index
+from indices import build_tempo_spatial_index, load_index, save_index
 from search.base import base_search
 from search.baseline.search_methods import sliding_framework
 from search.one_pass import one_pass_search
 from utilities import dataset
 from utilities.box2D import Box2D
 from utilities.config import config
-from utilities.data_preprocessing import traj_data, gen_border, view_field
+from utilities.data_preprocessing import traj_data, gen_border
 from utilities.dataset import load_yolo_for
+from utilities.track_store import TrackStore
 
 
-def get_index(file_name, cfg, higher_bound):
-    data, cols, cls_map = dataset.load_yolo_for(file_name)
-    trajs = traj_data(data, cols, 5, cls_map, scale=1)
-    # broders = gen_border(trajs.bbox, 16, 11)
-    broders = gen_border(view_field(data, *cols[-2:]), 8, 6)
+def get_index(file_name, cfg, higher_bound, snapshot=None):
+    if snapshot is not None and os.path.isdir(snapshot):
+        return load_index(snapshot, cfg)
+    if os.path.isdir(file_name):  # a track store written by `save_tracks`, read by chunks
+        store = TrackStore(file_name)
+        trajs = store.trajs(5, scale=1)
+        broders = gen_border(store.bbox, 8, 6)
+    else:
+        data, cols, cls_map = dataset.load_yolo_for(file_name)
+        trajs = traj_data(data, cols, 5, cls_map, scale=1)
+        broders = gen_border(trajs.bbox, 8, 6)
     config.gird_border = broders
     trajs = takewhile(lambda t: t[1] < higher_bound * 1.2, trajs)
     temp_spt = build_tempo_spatial_index(trajs, cfg)
+    if snapshot is not None:
+        save_index(temp_spt, snapshot)
     return temp_spt
 
 
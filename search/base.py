@@ -9,7 +9,7 @@ from operator import attrgetter
 import numpy as np
 
 from search.co_moving import CoMovementPattern
-from search.rest import group_until, state_sliding
+from search.rest import group_until, index_scan, state_sliding
 from search.verifier import candidate_verified_queue, obj_verify
 from utilities.box2D import Box2D
 from utilities.trajectory import TrajectoryIntervalSeg, Trajectory
@@ -118,8 +118,11 @@ class BaseSliding:
                     if start + tra.len > self.dur:
                         self.label_m[tra.id] = tra.label
                         self.end_q.append((tra.len + tra.begin - 1, tra.id))
-        else:
+        else:  # every trajectory begins by the start
+            heapq.heapify(self.end_q)
+            self.ts_grouped_traj = iter(())
             return
+        heapq.heapify(self.end_q)
         self.ts_grouped_traj = chain([(ts, trajs)], ts_grouped_traj)
         self.last_win_hi = ts + self.dur - 1
 
@@ -134,14 +137,25 @@ class BaseSliding:
 
 
 def base_search(spat_tempo_idx, region: Box2D, labels: Mapping, duration_range, interval):
+    # Note that spat_tempo should use fuzzy search but not fuzzy inner all
+    candidates, probation = index_scan(spat_tempo_idx, region, labels, duration_range, interval)
+    return sliding_search(spat_tempo_idx, candidates, probation, region, labels, duration_range, interval)
+
+
+def sliding_search(spat_tempo_idx, candidates, probation, region: Box2D, labels: Mapping, duration_range, interval):
+    """
+    the part of `base_search` after the index is searched.
+    :param candidates: entries which may be within region
+    :param probation: entries surely within region
+    """
     dur = duration_range[0]
     label_verifier = partial(obj_verify, labels)
-    # Note that spat_tempo should use fuzzy search but not fuzzy inner all
-    candidates, probation = zip(*(spat_tempo_idx[label].where_intersect(((region.bbox, duration_range), interval))
-                                  for label in labels))
-    verified = candidate_verified_queue(chain.from_iterable(candidates), region, dur)
+    segments = spat_tempo_idx.segments if spat_tempo_idx.columnar else None
+    if segments is not None:
+        probation = map(segments.interval_seg, probation)
+    verified = candidate_verified_queue(candidates, region, dur, segments)
     visited = {}
-    for seg in chain(verified, chain.from_iterable(probation)):
+    for seg in chain(verified, probation):
         if (old := visited.get(seg.id, None)) is None:
             visited[seg.id] = Trajectory(seg.id, seg.label, [seg.begin, seg.begin + seg.len])
         else:
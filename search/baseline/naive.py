@@ -1,4 +1,4 @@
-from collections import Counter
+from collections import Counter, deque
 from functools import partial
 
 from search.base import base_maintainer
@@ -20,6 +20,7 @@ class NaiveSliding:
         objs = self.dfilter(objs)
         self.olen_m.update(objs['oid'])
         self.label_m.update(objs.set_index('oid')['cls'])
+        return objs['oid']
 
     def _filter(self, low, high):
         ids = self.len_filter()
@@ -44,21 +45,18 @@ class NaiveSliding:
         if (win := next(self.wins_iter, None)) is None:
             return
         low, high = win[0][0], win[-1][0]
-        for _, objs in win:
-            self._update(objs)
+        kept = deque(self._update(objs) for _, objs in win)  # objects counted in every frame of the window
         if candi := self._filter(low, high):
             yield candi
 
-        abandoned = win[0][1]['oid']
         for win in self.wins_iter:
-            self._subtract(abandoned[abandoned.isin(self.olen_m)])
+            self._subtract(kept.popleft())
 
             fid, objs = win[-1]
             low = win[0][0]
-            self._update(objs)
+            kept.append(self._update(objs))
             if candi := self._filter(low, fid):
                 yield candi
-            abandoned = win[0][1]['oid']
 
 
 def base_slider(frames, dur, obj_verifier, dfilter):
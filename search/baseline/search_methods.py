@@ -4,14 +4,17 @@ from search.rest import df_filter
 from search.verifier import obj_verify
 from search.baseline.naive import base_slider
 from search.baseline.state import state_slider
+from search.baseline.vectorized import vectorized_slider
 from utilities.data_preprocessing import group_by_frame
 
 
 def sliding_framework(df, region, labels, duration, interval, *, method='base'):
     dur = duration[0]
-    frames = group_by_frame(df, interval)
     obj_verifier = partial(obj_verify, labels)
-    dfilter = partial(df_filter, reg_verfier=region.enclose, target_label=labels.keys())
+    if method == 'vectorized':
+        return vectorized_slider(df, region, labels, dur, interval, obj_verifier)
+    frames = group_by_frame(df, interval)
+    dfilter = partial(df_filter, reg_verifier=region.enclose, target_label=labels.keys())
     match method:
         case 'base':
             slider = base_slider
@@ -0,0 +1,77 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from search.base import base_maintainer
+from search.co_moving import CoMovementPattern
+from search.rest import state_sliding
+
+
+def window_patterns(df, region, labels: Mapping, win_len, interval):
+    """
+    yield the same patterns as `NaiveSliding`, but filter the whole table once and count objects of all windows
+    by array operations.
+    Windows slide over frames having any object in interval, as those `group_by_frame` returns.
+    :param df: data frame with columns [oid, fid, x, y, cls]
+    :param labels: {obj_label: count}
+    :param win_len: the number of frames in a window
+    """
+    fids = df['fid'].to_numpy()
+    keep = (fids >= interval[0]) & (fids <= interval[1])
+    frames = np.unique(fids[keep])
+    win_num = len(frames) - win_len + 1
+    if win_num <= 0:
+        return
+    keep &= df['cls'].isin(labels.keys()).to_numpy()
+    keep[keep] = region.enclose(df[['x', 'y']].to_numpy()[keep])
+
+    oids, cls = df['oid'].to_numpy()[keep], df['cls'].to_numpy()[keep]
+    pos = np.searchsorted(frames, fids[keep])
+    order = np.lexsort((pos, oids))
+    oids, cls, pos = oids[order], cls[order], pos[order]
+
+    # the window starting at frame w counts rows i, ..., i+win_len-1 of an object iff pos[i+win_len-1] < w+win_len
+    # and pos[i] >= w, so the object stays in all frames of windows in [pos[i+win_len-1]-win_len+1, pos[i]]
+    same = oids[:len(oids) - win_len + 1] == oids[win_len - 1:]
+    starts = np.maximum(pos[win_len - 1:] - win_len + 1, 0)[same]
+    ends = np.minimum(pos[:len(pos) - win_len + 1], win_num - 1)[same]
+    oids, cls = oids[:len(oids) - win_len + 1][same], cls[:len(cls) - win_len + 1][same]
+    valid = starts <= ends
+    starts, ends, oids, cls = starts[valid], ends[valid], oids[valid], cls[valid]
+    if not len(starts):
+        return
+    # merge overlapping windows of an object, whose starts and ends are both ascending
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = (oids[1:] != oids[:-1]) | (starts[1:] > ends[:-1] + 1)
+    heads = np.flatnonzero(new)
+    starts, ends, oids, cls = starts[heads], np.maximum.reduceat(ends, heads), oids[heads], cls[heads]
+
+    # how many objects of every label stay in all frames of a window
+    wanted = sorted(labels)
+    counts = np.zeros((len(wanted), win_num + 1), dtype=np.int64)
+    label_pos = np.searchsorted(wanted, cls)
+    np.add.at(counts, (label_pos, starts), 1)
+    np.add.at(counts, (label_pos, ends + 1), -1)
+    counts = np.cumsum(counts[:, :-1], axis=1)
+    # see `obj_verify`, every wanted label must show up
+    least = np.maximum([labels[label] for label in wanted], 1)
+    found = (counts >= least[:, None]).all(axis=0)
+    found &= frames[win_len - 1:] - frames[:win_num] == win_len - 1  # no frame is missing in a window
+
+    oids, cls = oids.tolist(), cls.tolist()
+    by_start, by_end = np.argsort(starts, kind='stable'), np.argsort(ends, kind='stable')
+    starts, ends = starts[by_start].tolist(), ends[by_end].tolist()
+    by_start, by_end = by_start.tolist(), by_end.tolist()
+    active, i, j = {}, 0, 0
+    for w in np.flatnonzero(found).tolist():
+        while i < len(starts) and starts[i] <= w:
+            active[by_start[i]] = None
+            i += 1
+        while j < len(ends) and ends[j] < w:
+            del active[by_end[j]]
+            j += 1
+        yield CoMovementPattern({oids[k]: cls[k] for k in active}, [frames[w].item(), frames[w + win_len - 1].item()])
+
+
+def vectorized_slider(df, region, labels, win_len, interval, obj_verifier):
+    return state_sliding(window_patterns(df, region, labels, win_len, interval), obj_verifier, base_maintainer)
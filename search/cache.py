@@ -0,0 +1,121 @@
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+
+from search.base import sliding_search
+from search.one_pass import sequential_search
+from search.rest import index_scan
+
+
+@dataclass(slots=True)
+class _Entry:
+    index: weakref.ref
+    version: int
+    results: list
+    candidates: list
+    probation: list
+    size: int
+
+
+class QueryCache:
+    """
+    an LRU cache in front of `one_pass_search` and `base_search`.
+    A query is answered from the cache if its signature (index, region, labels, duration range) and interval
+    are seen, regions being compared by shape, i.e. the bbox of a `Box2D` and the vertices of a `Polygon`.
+    Otherwise, if its interval is within that of a cached query with the same signature,
+    the cached index search result is filtered and only verification and the sweep run again.
+    Entries of an index are dropped once its `version` changes or it is collected, so that another index
+    reusing its id never hits them.
+    :param max_size: the most results and index entries in total kept by the cache
+    """
+    def __init__(self, max_size=1 << 20):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self.hits = self.partial_hits = self.misses = 0
+
+    def one_pass_search(self, tempo_spat_idx, region, labels: Mapping, duration_range, interval):
+        return self._search(sequential_search, True, tempo_spat_idx, region, labels, duration_range, interval)
+
+    def base_search(self, tempo_spat_idx, region, labels: Mapping, duration_range, interval):
+        return self._search(sliding_search, False, tempo_spat_idx, region, labels, duration_range, interval)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _search(self, finish, grouped, idx, region, labels, duration_range, interval):
+        sig = (finish.__name__, id(idx), region, frozenset(labels.items()), tuple(duration_range))
+        interval = tuple(interval)
+        if (entry := self._get((sig, interval), idx)) is not None:
+            self.hits += 1
+            return list(entry.results)
+
+        if (cover := self._cover(sig, interval, idx)) is not None:
+            self.partial_hits += 1
+            candidates, probation = (self._overlapped(idx, entries, interval, grouped)
+                                     for entries in (cover.candidates, cover.probation))
+        else:
+            self.misses += 1
+            candidates, probation = index_scan(idx, region, labels, duration_range, interval)
+            candidates, probation = ([list(group) for group in candidates] if grouped else list(candidates),
+                                     [list(group) for group in probation] if grouped else list(probation))
+        results = list(finish(idx, iter(candidates), iter(probation), region, labels, duration_range, interval))
+        size = len(results) + sum(map(len, candidates)) + sum(map(len, probation)) if grouped else \
+            len(results) + len(candidates) + len(probation)
+        self._put((sig, interval), _Entry(weakref.ref(idx), idx.version, results, candidates, probation, size))
+        return list(results)
+
+    def _get(self, key, idx):
+        if (entry := self._entries.get(key)) is None:
+            return None
+        if not _current(entry, idx):
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _cover(self, sig, interval, idx):
+        for (entry_sig, (lo, hi)), entry in reversed(self._entries.items()):
+            if entry_sig == sig and _current(entry, idx) and lo <= interval[0] and interval[1] <= hi:
+                self._entries.move_to_end((entry_sig, (lo, hi)))
+                return entry
+        return None
+
+    @staticmethod
+    def _overlapped(idx, entries, interval, grouped):
+        """
+        keep entries the index would return for $interval, see `intersect_fuzzy_inner_all`
+        """
+        lo, hi = interval
+        if idx.columnar:
+            segments = idx.segments
+
+            def overlap(rows):
+                rows = np.asarray(rows, dtype=np.int64)
+                begins = segments.begins[rows]
+                return rows[(begins <= hi) & (begins + segments.lens[rows] > lo)].tolist()
+        else:
+            def overlap(segs):
+                return [seg for seg in segs if seg.begin <= hi and seg.begin + seg.len > lo]
+        return [overlap(group) for group in entries] if grouped else overlap(entries)
+
+    def _put(self, key, entry):
+        if key in self._entries:
+            self._pop(key)
+        if entry.size > self.max_size:
+            return
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_size:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        self.size -= self._entries.pop(key).size
+
+
+def _current(entry, idx):
+    return entry.index() is idx and entry.version == idx.version
@@ -0,0 +1,163 @@
+import heapq
+from collections import defaultdict
+from collections.abc import Iterable
+from functools import partial
+from itertools import chain
+from operator import attrgetter, itemgetter
+
+import numpy as np
+
+from indices.region import GridRegion
+from indices.segments import SegmentTable
+from search.one_pass import SequentialSearcher
+from search.rest import index_bounds, region_key, yield_co_move
+from search.verifier import verified_queue, verify_masks
+from utilities.point_relation import enclose_each
+from utilities.trajectory import TrajectoryIntervalSeg
+
+
+def multi_query_search(tempo_spat_idx, queries: Iterable, chunk=1 << 15) -> list[SequentialSearcher]:
+    """
+    run many `one_pass_search` queries at once.
+    Queries sharing a label and a duration range share one index search over the union of their regions and
+    intervals, and points of the found segments are tested against all regions together.
+    Each query then merges its own share of the segments exactly as `one_pass_search` does.
+    :param tempo_spat_idx: index whose temporal search method is 'FuzzyInnerAll'
+    :param queries: iterable of (region, labels, duration_range, interval)
+    :param chunk: how many points are tested against all regions at a time
+    :return: a searcher per query, yielding the same as `one_pass_search`
+    """
+    queries = list(queries)
+    groups = defaultdict(list)
+    for qid, (_, labels, duration_range, _) in enumerate(queries):
+        for label_pos, label in enumerate(labels):
+            groups[label, tuple(duration_range)].append((qid, label_pos))
+
+    plans = [[] for _ in queries]
+    for (label, duration_range), members in groups.items():
+        scan = _Scan(tempo_spat_idx, label, duration_range, [queries[qid] for qid, _ in members], chunk)
+        for col, (qid, label_pos) in enumerate(members):
+            plans[qid].append((label_pos, scan, col))
+    return [_searcher(tempo_spat_idx, query, sorted(plan, key=itemgetter(0))) for query, plan in zip(queries, plans)]
+
+
+def _searcher(tempo_spat_idx, query, plan):
+    """
+    :param plan: (label position, scan, column of the query in the scan) of each label of the query
+    """
+    region, labels, duration_range, interval = query
+    handle = int if tempo_spat_idx.columnar else id
+    candidates, probation, owner = [], [], {}
+    for _, scan, col in plan:
+        cand_groups, prob_groups = scan.groups(col, region)
+        probation.extend([scan.entries[i] for i in group] for group in prob_groups)
+        for group in cand_groups:
+            entries = [scan.entries[i] for i in group]
+            owner.update(zip(map(handle, entries), ((scan, col, i) for i in group)))
+            candidates.append(entries)
+
+    def verify(entry):
+        scan, col, i = owner[handle(entry)]
+        return scan.verify(i, col)
+
+    # merge everything in the same way as `sequential_search`
+    if tempo_spat_idx.columnar:
+        segments = tempo_spat_idx.segments
+        begin_of = segments.begins.__getitem__
+        candidates = heapq.merge(*candidates, key=begin_of)
+        probation = (map(segments.interval_seg, rows) for rows in probation)
+    else:
+        begin_of = attrgetter('begin')
+        candidates = heapq.merge(*candidates, key=begin_of)
+    traj_queue = heapq.merge(*probation, verified_queue(candidates, verify, begin_of), key=attrgetter('begin'))
+    return SequentialSearcher(traj_queue, interval, partial(yield_co_move, duration_range[0], labels))
+
+
+class _Scan:
+    """
+    segments of a label found by one index search for many queries, in the order the index returns them
+    """
+    def __init__(self, tempo_spat_idx, label, duration_range, queries, chunk):
+        bboxes = np.array([region.bbox for region, *_ in queries])
+        bbox = np.column_stack((bboxes[:, ::2].min(axis=0), bboxes[:, 1::2].max(axis=0))).ravel().tolist()
+        intervals = np.array([interval for *_, interval in queries])
+        interval = intervals[:, 0].min().item(), intervals[:, 1].max().item()
+        candidates, probation = tempo_spat_idx[label].where_intersect(((bbox, duration_range),
+                                                                       index_bounds(interval)))
+        self.entries, gids = [], []
+        for gid, group in enumerate(chain(candidates, probation)):
+            size = len(self.entries)
+            self.entries.extend(group)
+            gids.extend([gid] * (len(self.entries) - size))
+        self.gids = np.array(gids, dtype=np.int64)
+        if tempo_spat_idx.columnar:
+            table = tempo_spat_idx.segments.take(np.array(self.entries, dtype=np.int64))
+        else:
+            table = _table_of(self.entries)
+
+        n = len(table)
+        begins, lens = table.begins.astype(np.int64), table.lens
+        # the same overlap rule as the temporal index, see `intersect_fuzzy_inner_all`
+        self.overlap = (begins[:, None] <= intervals[:, 1]) & ((begins + lens)[:, None] > intervals[:, 0])
+        self.cells = GridRegion().index(table.points[table.offsets[:-1]]) if n else np.empty(0, np.int32)
+        self.ids, self.begins, self.labels = table.ids.tolist(), table.begins.tolist(), table.labels.tolist()
+
+        # points of segments whose bounding box meets no query region are not tested
+        near = self.overlap.copy()
+        if n:
+            seg_lo = np.minimum.reduceat(table.points, table.offsets[:-1])
+            seg_hi = np.maximum.reduceat(table.points, table.offsets[:-1])
+            for dim in range(table.points.shape[1]):
+                near &= (seg_hi[:, dim, None] >= bboxes[:, 2 * dim]) & \
+                    (seg_lo[:, dim, None] <= bboxes[:, 2 * dim + 1])
+        # test every point of a segment against every query region it is near to, all at once
+        rows, cols = np.nonzero(near)
+        pair_lens = lens[rows]
+        pair_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(pair_lens, out=pair_offsets[1:])
+        point_idx = np.repeat(table.offsets[rows] - pair_offsets[:-1], pair_lens) + np.arange(pair_offsets[-1])
+        box_idx = np.repeat(cols, pair_lens)
+        regions = [region for region, *_ in queries]
+        inside = np.empty(len(point_idx), dtype=bool)
+        for i in range(0, len(point_idx), chunk):
+            inside[i:i + chunk] = enclose_each(regions, table.points[point_idx[i:i + chunk]], box_idx[i:i + chunk])
+        pairs, starts, part_lens = verify_masks(inside, pair_offsets, duration_range[0])
+        self.part_starts, self.part_lens = (starts + begins[rows[pairs]]).tolist(), part_lens.tolist()
+        # pairs without parts within region are left -1
+        self.part_offsets = np.searchsorted(pairs, np.arange(len(rows) + 1)).tolist()
+        self.pair_of = np.full(near.shape, -1, dtype=np.int64)
+        self.pair_of[rows[pairs], cols[pairs]] = pairs
+
+    def groups(self, col, region):
+        """
+        :return: (candidate, probation), segment groups the index returns for a query,
+            as `intersect_not_sure_search` over `intersect_fuzzy_inner_all` does
+        """
+        res = []
+        for cells in GridRegion().cells_intersect(region_key(region)):
+            rows = np.flatnonzero(self.overlap[:, col] & np.isin(self.cells, cells))
+            # groups of the same cell are visited in the same order as in the scan
+            rows = rows[np.argsort(self.cells[rows], kind='stable')]
+            res.append(np.split(rows, np.flatnonzero(np.diff(self.gids[rows])) + 1) if len(rows) else [])
+        return res
+
+    def verify(self, i, col):
+        if (pair := self.pair_of[i, col]) < 0:
+            return []
+        sid, label = self.ids[i], self.labels[i]
+        lo, hi = self.part_offsets[pair], self.part_offsets[pair + 1]
+        return [TrajectoryIntervalSeg(sid, begin, label, length)
+                for begin, length in zip(self.part_starts[lo:hi], self.part_lens[lo:hi])]
+
+
+def _table_of(segs) -> SegmentTable:
+    if not segs:
+        return SegmentTable.empty()
+    lens = np.fromiter((seg.len for seg in segs), np.int64, len(segs))
+    offsets = np.zeros(len(segs) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    # lifelongs are not kept by segment objects, nor needed here
+    return SegmentTable(np.fromiter((seg.id for seg in segs), np.int64, len(segs)),
+                        np.fromiter((seg.begin for seg in segs), np.int32, len(segs)),
+                        np.fromiter((seg.label for seg in segs), np.int16, len(segs)),
+                        np.zeros(len(segs), np.int32), offsets, np.concatenate([seg.points for seg in segs]))
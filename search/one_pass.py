@@ -5,7 +5,7 @@ from functools import partial
 from itertools import chain, groupby
 from operator import attrgetter
 
-from search.rest import yield_co_move, group_until
+from search.rest import ActiveSet, group_until, index_scan, yield_co_move
 from search.verifier import candidate_verified_queue
 from utilities.box2D import Box2D
 from utilities.trajectory import TrajectoryIntervalSeg, TrajectorySequenceSeg
@@ -15,7 +15,7 @@ class SequentialSearcher:
     def __init__(self, trajs: Iterable[TrajectoryIntervalSeg | TrajectorySequenceSeg], interval, verifier):
         self.ts_grouped_traj = groupby(trajs, attrgetter('begin'))
         self.interval = interval
-        self.playground = {}
+        self.playground = ActiveSet()
         self.verify = partial(verifier, self.playground)
         end_time_queue = []
         self.etq_push = partial(heapq.heappush, end_time_queue)
@@ -78,12 +78,26 @@ class SequentialSearcher:
 
 
 def one_pass_search(tempo_spat_idx, region: Box2D, labels: Mapping, duration_range, interval):
-    # FIXME: only rectangle region
-    candidates, probation = zip(*(tempo_spat_idx[label].where_intersect(((region.bbox, duration_range), interval))
-                                  for label in labels))
-    traj_queue = heapq.merge(*chain.from_iterable(probation),
-                             candidate_verified_queue(heapq.merge(*chain.from_iterable(candidates)),
-                                                      region, duration_range[0]),
+    candidates, probation = index_scan(tempo_spat_idx, region, labels, duration_range, interval)
+    return sequential_search(tempo_spat_idx, candidates, probation, region, labels, duration_range, interval)
+
+
+def sequential_search(tempo_spat_idx, candidates, probation, region: Box2D, labels: Mapping, duration_range,
+                      interval):
+    """
+    the part of `one_pass_search` after the index is searched.
+    :param candidates: groups of entries which may be within region, each group is sorted by `begin`
+    :param probation: groups of entries surely within region, each group is sorted by `begin`
+    """
+    if tempo_spat_idx.columnar:
+        segments = tempo_spat_idx.segments
+        candidates = heapq.merge(*candidates, key=segments.begins.__getitem__)
+        probation = (map(segments.interval_seg, rows) for rows in probation)
+    else:
+        segments = None
+        candidates = heapq.merge(*candidates, key=attrgetter('begin'))
+    traj_queue = heapq.merge(*probation,
+                             candidate_verified_queue(candidates, region, duration_range[0], segments),
                              key=attrgetter('begin'))
     verifier = partial(yield_co_move, duration_range[0], labels)
     return SequentialSearcher(traj_queue, interval, verifier)
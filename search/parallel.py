@@ -0,0 +1,95 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Mapping
+
+from search.one_pass import one_pass_search
+from utilities.box2D import Box2D
+from utilities.config import config
+
+
+def time_shards(interval, duration_range, shards):
+    """
+    split a query interval into time shards searched independently.
+    Segments are indexed by the lifelong of their trajectories, which is less than `duration_range[1]`, so no
+    object co-moving at a time has been in the region for that long. A shard thus starts its sweep so many frames
+    earlier, whose results before its own range are dropped, and sees the same objects in the same order as a
+    sweep of the whole interval.
+    :param interval: [begin, end] of the query
+    :param shards: the most shards, shards shorter than the overlap are merged
+    :return: list of (interval to sweep, (lo, hi)): a shard keeps results ending in [lo, hi), None if unbounded
+    """
+    begin, finish = interval
+    overlap = duration_range[1] + 1
+    shards = max(min(shards, int((finish - begin + 1) // overlap)), 1)
+    cuts = [begin + (finish - begin + 1) * k // shards for k in range(1, shards)]
+    los, his = [None] + cuts, cuts + [None]
+    # a sweep gives results at an end time t as ids co-moving in [start, t - 1]
+    return [((begin if lo is None else max(math.floor(lo - overlap), begin), finish if hi is None else hi),
+             (None if lo is None else lo - 1, None if hi is None else hi - 1)) for lo, hi in zip(los, his)]
+
+
+class ShardedSearch:
+    """
+    a process pool answering `one_pass_search` of an index by time shards, see `time_shards`.
+    Results are the same as those of a single sweep and in the same order.
+    Workers get the index when they start, which is inherited if processes are forked, so that a columnar index
+    loaded by `load_index` keeps its points memory-mapped and shared. Otherwise, e.g. with the 'spawn' start method,
+    its segment table and layout are pickled once per worker, which indexes them again, see
+    `TempoSpatialIndex.__reduce__`.
+    Note that 'Fuzzy' temporal searches visit every duration whatever the interval is, so that part of the index
+    search is repeated per shard, while 'Interval' ones only find segments of a shard.
+    :param tempo_spat_idx: the index searched
+    :param workers: process number
+    :param mp_context: multiprocessing context of workers, the default start method if None
+    """
+    def __init__(self, tempo_spat_idx, workers, mp_context=None):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(workers, mp_context, initializer=_attach, initargs=(tempo_spat_idx,))
+
+    def one_pass_search(self, region: Box2D, labels: Mapping, duration_range, interval, shards=None):
+        """
+        :param shards: the most time shards, `workers` by default
+        :return: iterator of tuple(ids, start, end)
+        """
+        tasks = time_shards(interval, duration_range, shards or self.workers)
+        futures = [self._pool.submit(_search_shard, region, labels, duration_range, shard_interval, keep)
+                   for shard_interval, keep in tasks]
+        return chain.from_iterable(future.result() for future in futures)
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parallel_one_pass_search(tempo_spat_idx, region: Box2D, labels: Mapping, duration_range, interval, workers,
+                             mp_context=None):
+    """
+    `one_pass_search` by time shards in a process pool of $workers, which is started and shut down per query,
+    prefer `ShardedSearch` for many queries.
+    """
+    if len(time_shards(interval, duration_range, workers)) == 1:
+        return one_pass_search(tempo_spat_idx, region, labels, duration_range, interval)
+    with ShardedSearch(tempo_spat_idx, workers, mp_context) as searcher:
+        return list(searcher.one_pass_search(region, labels, duration_range, interval))
+
+
+def _attach(index):
+    global _index
+    config.gird_border = index.borders
+    _index = index
+
+
+def _search_shard(region, labels, duration_range, interval, keep):
+    lo, hi = keep
+    return [res for res in one_pass_search(_index, region, labels, duration_range, interval)
+            if (lo is None or res[2] >= lo) and (hi is None or res[2] < hi)]
+
+
+# the index searched by a worker, set when it starts
+_index = None
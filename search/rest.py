@@ -1,16 +1,91 @@
 import heapq
+from bisect import bisect_right
 from collections import Counter, deque
 from collections.abc import Iterable, MutableMapping
 from collections.abc import Mapping, Sequence
-from itertools import takewhile, islice
+from itertools import chain, compress, islice, takewhile
 from operator import attrgetter
 
 import numpy as np
 
 from search.co_moving import CoMovementPattern
+from utilities.box2D import Box2D
 from utilities.trajectory import BasicTrajectorySeg
 
 
+class ActiveSet(MutableMapping):
+    """
+    {obj_id: trajectory} of a sweep, iterated in insertion order as a dict is.
+    Ids, begins and labels are also kept in lists of insertion order and objects are counted per label, so that
+    `yield_co_move` checks labels and gathers candidates without visiting trajectories one by one.
+    Deleted entries are only marked dead until they outnumber live ones.
+    """
+    def __init__(self):
+        self._trajs = {}
+        self._pos = {}  # obj_id -> position in lists
+        self._ids, self._begins, self._labels, self._alive = [], [], [], []
+        self._ordered = True  # whether begins never decrease in lists
+        self.label_counts = Counter()
+
+    def __getitem__(self, key):
+        return self._trajs[key]
+
+    def __setitem__(self, key, traj):
+        begin = traj.begin
+        if (pos := self._pos.get(key)) is None:
+            if self._begins and begin < self._begins[-1]:
+                self._ordered = False
+            self._pos[key] = len(self._ids)
+            self._ids.append(key)
+            self._begins.append(begin)
+            self._labels.append(traj.label)
+            self._alive.append(True)
+        else:  # replaced in place, as a dict keeps the position of a key
+            self.label_counts[self._labels[pos]] -= 1
+            if begin != self._begins[pos]:
+                self._ordered = False
+            self._begins[pos], self._labels[pos] = begin, traj.label
+        self.label_counts[traj.label] += 1
+        self._trajs[key] = traj
+
+    def __delitem__(self, key):
+        del self._trajs[key]
+        pos = self._pos.pop(key)
+        self._alive[pos] = False
+        self.label_counts[self._labels[pos]] -= 1
+        if len(self._ids) > 2 * len(self._trajs) + 32:
+            self._compact()
+
+    def __iter__(self):
+        return iter(self._trajs)
+
+    def __len__(self):
+        return len(self._trajs)
+
+    def values(self):
+        return self._trajs.values()
+
+    def ready(self, latest_begin):
+        """
+        the same as `takewhile(lambda traj: traj.begin <= latest_begin, self.values())`
+        :return: (ids, begins, labels) lists of those trajectories, in insertion order
+        """
+        if self._ordered:
+            stop = bisect_right(self._begins, latest_begin)
+        else:
+            stop = next((pos for pos, (begin, alive) in enumerate(zip(self._begins, self._alive))
+                         if alive and begin > latest_begin), len(self._begins))
+        alive = self._alive[:stop]
+        return tuple(list(compress(values[:stop], alive)) for values in (self._ids, self._begins, self._labels))
+
+    def _compact(self):
+        alive = self._alive
+        self._ids, self._begins, self._labels = (list(compress(values, alive))
+                                                 for values in (self._ids, self._begins, self._labels))
+        self._alive = [True] * len(self._ids)
+        self._pos = dict(zip(self._ids, range(len(self._ids))))
+
+
 def yield_co_move(duration: int, labels: Mapping[int, int], active_space: MutableMapping[int, BasicTrajectorySeg],
                   timestamp: int, traj_required: Sequence) -> Iterable[tuple[list[int], int, int]]:
     """
@@ -18,7 +93,7 @@ def yield_co_move(duration: int, labels: Mapping[int, int], active_space: Mutabl
     Note that this function may modify `active_space`.
     :param duration: objects co-moving duration
     :param labels: {obj_label: count}
-    :param active_space: {obj_id: trajectory}
+    :param active_space: {obj_id: trajectory}, an `ActiveSet` is checked by arrays rather than trajectories
     :param timestamp: current processing time
     :param traj_required: trajectories need processing
     :return: iterator of tuple(ids, start, end)
@@ -30,6 +105,16 @@ def yield_co_move(duration: int, labels: Mapping[int, int], active_space: Mutabl
             del active_space[traj.id]
         return
 
+    if isinstance(active_space, ActiveSet):
+        # every wanted label must show up, see `obj_verify`. Candidates are a part of active objects
+        counts = active_space.label_counts
+        if any(counts[label] < max(count, 1) for label, count in labels.items()):
+            for traj in traj_required:
+                del active_space[traj.id]
+            return
+        yield from _yield_active_set(duration, labels, active_space, timestamp, traj_required, id_required)
+        return
+
     traj_cand = [traj for traj in takewhile(lambda traj: timestamp - traj.begin >= duration, active_space.values())]
     for traj in traj_required:
         del active_space[traj.id]
@@ -56,6 +141,59 @@ def yield_co_move(duration: int, labels: Mapping[int, int], active_space: Mutabl
                 break
 
 
+def _yield_active_set(duration, labels, active_space: ActiveSet, timestamp, traj_required, id_required):
+    """
+    `yield_co_move` of an `ActiveSet`, the same results in the same order
+    """
+    ids, begins, cand_labels = active_space.ready(timestamp - duration)
+    for traj in traj_required:
+        del active_space[traj.id]
+
+    result_bag = Counter(cand_labels)
+    assert len(result_bag) <= len(labels)
+    if not ids or len(result_bag) < len(labels) or any(result_bag[label] < count for label, count in labels.items()):
+        return
+    res_pos = np.flatnonzero(np.diff(begins, append=-1)).tolist()
+    timestamp -= 1  # the end point is exclusive
+    for i in reversed(res_pos):  # start at the least duration
+        yield ids[:i+1], begins[i], timestamp
+        label = cand_labels[i]
+        result_bag[label] -= 1
+        id_required.discard(ids[i])
+        if not id_required or result_bag[label] < labels[label]:
+            break
+
+
+def region_key(region):
+    """
+    :return: what the spatial index is searched with, the bbox of a box or the region itself
+    """
+    return region.bbox if isinstance(region, Box2D) else region
+
+
+def index_bounds(interval):
+    """
+    query intervals are [begin, end] with both ends inclusive, while range searches of the index are half-open
+    :return: the range searched for segments overlapping $interval
+    """
+    return interval[0], interval[1] + 1
+
+
+def index_scan(tempo_spat_idx, region, labels: Mapping, duration_range, interval):
+    """
+    search the index of every wanted label, nothing if the index tells the query is surely empty.
+    :return: (candidates, probation): index search results of segments that may be or are surely within region,
+        whose items are entries or groups of entries, depending on the temporal search strategy
+    """
+    if not tempo_spat_idx.may_match(region, labels, interval):
+        return iter(()), iter(())
+    key = region_key(region)
+    bounds = index_bounds(interval)
+    candidates, probation = zip(*(tempo_spat_idx[label].where_intersect(((key, duration_range), bounds))
+                                  for label in labels))
+    return chain.from_iterable(candidates), chain.from_iterable(probation)
+
+
 def group_until(queue, ts):
     if not queue or queue[0][0] > ts:
         return
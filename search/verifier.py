@@ -1,33 +1,75 @@
-from _bisect import bisect_right
-from itertools import islice
+import heapq
+from itertools import count
 from operator import attrgetter
 from typing import Iterable
 
 import numpy as np
 
+from indices.segments import SegmentTable
 from utilities.box2D import Box2D
 from utilities.trajectory import TrajectoryIntervalSeg, TrajectorySequenceSeg
 
 
-def candidate_verified_queue(candidates: Iterable, region: Box2D, duration: int) -> Iterable[TrajectoryIntervalSeg]:
+def candidate_verified_queue(candidates: Iterable, region: Box2D, duration: int,
+                             segments: SegmentTable = None) -> Iterable[TrajectoryIntervalSeg]:
     """
-    verify trajectories and find the segments within region
+    verify trajectories and find the segments within region.
+    Points of all candidates are tested at once, and their parts within region are found by `verify_masks`.
     :param region: a box object with `enclose` function implemented
     :param candidates: trajectories source
     :param duration: the least lifetime of a segment
-    :return: trajectory segments within region, which are guaranteed to be sorted by `begin` if `candidates` is sorted.
+    :param segments: if given, $candidates are row ids of this table
+    :return: trajectory segments within region sorted by `begin`, the same as `verified_queue` yields
+        if `candidates` is sorted.
     """
-    verified = []
+    if segments is None:
+        cands = list(candidates)
+        num = len(cands)
+        if not num:
+            return iter(())
+        ids, begins, labels = (np.fromiter(map(attrgetter(name), cands), np.int64, num)
+                               for name in ('id', 'begin', 'label'))
+        lens = np.fromiter((len(cand.points) for cand in cands), np.int64, num)
+        points = np.concatenate([cand.points for cand in cands])
+    else:
+        rows = np.fromiter(candidates, np.int64)
+        if not len(rows):
+            return iter(())
+        ids, begins, labels = segments.ids[rows], segments.begins[rows].astype(np.int64), segments.labels[rows]
+        lens = segments.offsets[rows + 1] - segments.offsets[rows]
+    offsets = np.zeros(len(lens) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    if segments is not None:
+        points = segments.points[np.repeat(segments.offsets[rows] - offsets[:-1], lens) + np.arange(offsets[-1])]
+
+    segs, starts, part_lens = verify_masks(region.enclose(points), offsets, duration)
+    part_begins = begins[segs] + starts
+    # a stable sort keeps parts of equal begins in the order of candidates, as `verified_queue` does
+    order = np.argsort(part_begins, kind='stable')
+    segs = segs[order]
+    return map(TrajectoryIntervalSeg, ids[segs].tolist(), part_begins[order].tolist(), labels[segs].tolist(),
+               part_lens[order].tolist())
+
+
+def verified_queue(candidates: Iterable, verify, begin_of) -> Iterable[TrajectoryIntervalSeg]:
+    """
+    the same as `candidate_verified_queue`, but how to verify a candidate is up to the caller.
+    Parts wait in a heap until a candidate begins after them, as parts never begin before their candidates.
+    :param verify: map a candidate to its parts within region, sorted by `begin`
+    :param begin_of: map a candidate to its `begin`
+    """
+    pending = []
+    order = count()  # parts of equal begins leave in the order they are found
     for cand_seg in candidates:
-        segs = verify_seg(cand_seg, region, duration)
+        segs = verify(cand_seg)
         if segs:
-            pos = bisect_right(verified, cand_seg.begin, key=attrgetter('begin'))
-            if pos > 0:
-                yield from islice(verified, pos)
-                verified = verified[pos:]
-            verified.extend(segs)
-            verified.sort(key=attrgetter('begin'))
-    yield from verified
+            watermark = begin_of(cand_seg)
+            while pending and pending[0][0] <= watermark:
+                yield heapq.heappop(pending)[2]
+            for seg in segs:
+                heapq.heappush(pending, (seg.begin, next(order), seg))
+    while pending:
+        yield heapq.heappop(pending)[2]
 
 
 def verify_seg(segment: TrajectorySequenceSeg, region: Box2D, duration: int) -> list[TrajectoryIntervalSeg]:
@@ -38,24 +80,60 @@ def verify_seg(segment: TrajectorySequenceSeg, region: Box2D, duration: int) ->
     :param duration: the least lifetime of a segment
     :return: sorted parts of the segment by `begin`simplify verified queue
     """
-    mask = region.enclose(segment.points)
+    return verify_points(segment.id, segment.begin, segment.label, segment.points, region, duration)
+
+
+def verify_row(segments: SegmentTable, row: int, region: Box2D, duration: int) -> list[TrajectoryIntervalSeg]:
+    """
+    the same as `verify_seg`, but the segment is a row of a segment table
+    """
+    return verify_points(int(segments.ids[row]), int(segments.begins[row]), int(segments.labels[row]),
+                         segments.points_of(row), region, duration)
+
+
+def verify_points(sid, begin, label, points, region: Box2D, duration: int) -> list[TrajectoryIntervalSeg]:
+    mask = region.enclose(points)
     in_pos = np.flatnonzero(mask)
-    if len(in_pos) != 0:
-        sid, begin, label = segment.id, segment.begin, segment.label
-        if mask.all():
-            yield TrajectoryIntervalSeg(sid, begin, label, len(mask))
-            return
-
-        start_pos = np.flatnonzero(np.diff(in_pos, prepend=-2) > 1)
-        seg_lens = np.diff(start_pos, append=len(in_pos))
-        res_mask = np.flatnonzero(seg_lens >= duration)
-        if mask[0] and seg_lens[0] < duration:
-            yield TrajectoryIntervalSeg(sid, begin, label, seg_lens[0])
-
-        yield from (TrajectoryIntervalSeg(sid, begin + in_pos[start_pos[m]], label, seg_lens[m]) for m in res_mask)
-
-        if mask[-1] and seg_lens[-1] < duration:
-            yield TrajectoryIntervalSeg(sid, begin + in_pos[start_pos[-1]], label, seg_lens[-1])
+    if len(in_pos) == 0:
+        return []
+    if mask.all():
+        return [TrajectoryIntervalSeg(sid, begin, label, len(mask))]
+
+    res = []
+    start_pos = np.flatnonzero(np.diff(in_pos, prepend=-2) > 1)
+    seg_lens = np.diff(start_pos, append=len(in_pos))
+    res_mask = np.flatnonzero(seg_lens >= duration)
+    if mask[0] and seg_lens[0] < duration:
+        res.append(TrajectoryIntervalSeg(sid, begin, label, seg_lens[0]))
+
+    res.extend(TrajectoryIntervalSeg(sid, begin + in_pos[start_pos[m]], label, seg_lens[m]) for m in res_mask)
+
+    if mask[-1] and seg_lens[-1] < duration:
+        res.append(TrajectoryIntervalSeg(sid, begin + in_pos[start_pos[-1]], label, seg_lens[-1]))
+    return res
+
+
+def verify_masks(masks, offsets, duration: int):
+    """
+    the vectorised `verify_points` over many segments, given which of their points are within region
+    :param masks: concatenated masks of segments, segment i owns masks[offsets[i]:offsets[i+1]]
+    :param offsets: array of segment number + 1 ascending positions, starting at 0
+    :param duration: the least lifetime of a part
+    :return: (segment, start, length) arrays of parts within region, sorted by segment and start,
+        where start is relative to the segment
+    """
+    bound = np.zeros(len(masks) + 1, dtype=bool)
+    bound[offsets] = True
+    run_start = masks.copy()
+    run_start[1:] &= ~masks[:-1] | bound[1:-1]
+    run_end = masks.copy()
+    run_end[:-1] &= ~masks[1:] | bound[1:-1]
+    starts, ends = np.flatnonzero(run_start), np.flatnonzero(run_end) + 1
+    segs = np.searchsorted(offsets, starts, side='right') - 1
+    lens = ends - starts
+    # short parts are kept only if they reach either end of their segments, see `verify_points`
+    keep = (lens >= duration) | (starts == offsets[segs]) | (ends == offsets[segs + 1])
+    return segs[keep], (starts - offsets[segs])[keep], lens[keep]
 
 
 def obj_verify(target, label_map):
@@ -1,3 +1,5 @@
+import numpy as np
+
 from indices import build_tempo_spatial_index
 from utilities import dataset
 from utilities.box2D import Box2D
@@ -24,3 +26,14 @@ def query4test():
              (10, 30),
              (0, 50)]
     return test1, test2
+
+
+walk_border = [list(range(0, 501, 100)), list(range(0, 501, 125))]
+
+
+def walk_trajs(num=30):
+    rng = np.random.default_rng(7)
+    for tid in range(num):
+        steps = rng.integers(-30, 31, size=(int(rng.integers(10, 60)), 2))
+        track = np.clip(np.cumsum(steps, axis=0) + rng.integers(0, 500, 2), 0, 499).astype(np.int32)
+        yield tid, int(rng.integers(0, 100)), tid % 2, track
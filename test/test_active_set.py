@@ -0,0 +1,39 @@
+import numpy as np
+
+from search.rest import ActiveSet, yield_co_move
+from utilities.trajectory import BasicTrajectorySeg
+
+
+def test_active_set():
+    active = ActiveSet()
+    for tid, begin, label in [(3, 0, 1), (7, 2, 0), (1, 2, 1), (5, 4, 0)]:
+        active[tid] = BasicTrajectorySeg(tid, begin, label)
+    del active[7]
+    active[3] = BasicTrajectorySeg(3, 0, 0)  # replaced in place
+    assert list(active) == [3, 1, 5] and active.label_counts == {0: 2, 1: 1}
+    assert active.ready(2) == ([3, 1], [0, 2], [0, 1])
+    for tid in range(100, 200):
+        active[tid] = BasicTrajectorySeg(tid, 5, 1)
+        del active[tid]
+    assert list(active) == [3, 1, 5] and active.ready(9) == ([3, 1, 5], [0, 2, 4], [0, 1, 0])
+
+
+def test_yield_co_move_active_set():
+    rng = np.random.default_rng(0)
+    duration = 3
+    for labels in [{0: 1}, {0: 2, 1: 1}, {1: 3, 2: 1}]:
+        dict_space, active = {}, ActiveSet()
+        alive, tid, found = [], 0, 0
+        for ts in range(300):
+            for _ in range(rng.integers(0, 4)):
+                traj = BasicTrajectorySeg(tid, ts, int(rng.choice(list(labels))))
+                dict_space[tid] = active[tid] = traj
+                alive.append(traj)
+                tid += 1
+            ended = [alive.pop(i) for i in sorted(set(rng.integers(0, len(alive), 2).tolist()), reverse=True)] \
+                if alive else []
+            expected = list(yield_co_move(duration, labels, dict_space, ts, ended))
+            assert list(yield_co_move(duration, labels, active, ts, ended)) == expected
+            assert list(active) == list(dict_space)
+            found += len(expected)
+        assert found
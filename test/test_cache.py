@@ -0,0 +1,63 @@
+from configs import cfg
+from indices import build_tempo_spatial_index
+from indices.segments import SegmentTable
+from indices.region import GridRegion
+from search.base import base_search
+from search.cache import QueryCache
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+from utilities.point_relation import Polygon
+
+query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60)]
+
+
+def test_cache_hits():
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    cache = QueryCache()
+    first = cache.one_pass_search(index, *query, (0, 150))
+    assert first == list(one_pass_search(index, *query, (0, 150)))
+    assert cache.one_pass_search(index, *query, (0, 150)) == first
+    assert cache.hits == 1
+    for interval in ((20, 120), (0, 60), (90, 150)):
+        assert cache.one_pass_search(index, *query, interval) == list(one_pass_search(index, *query, interval))
+    assert cache.partial_hits == 3 and cache.misses == 1
+
+
+def test_cache_base_search():
+    config.gird_border = walk_border
+    base_cfg = cfg.clone()
+    base_cfg.INDEX.SEARCH_METHOD.TEMPO = 'FuzzySearch'
+    index = build_tempo_spatial_index(walk_trajs(), base_cfg)
+    cache = QueryCache()
+    cache.base_search(index, *query, (0, 150))
+    assert cache.base_search(index, *query, (30, 100)) == list(base_search(index, *query, (30, 100)))
+    assert cache.partial_hits == 1
+
+
+def test_cache_invalidation():
+    config.gird_border = walk_border
+    trajs = list(walk_trajs())
+    index = build_tempo_spatial_index(trajs[:20], cfg)
+    cache = QueryCache()
+    cache.one_pass_search(index, *query, (0, 150))
+    index.add_table(SegmentTable.from_trajs(trajs[20:], GridRegion()))
+    assert cache.one_pass_search(index, *query, (0, 150)) == list(one_pass_search(index, *query, (0, 150)))
+    assert cache.misses == 2 and len(cache._entries) == 1
+
+
+def test_cache_regions_sharing_bbox():
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    cache = QueryCache()
+    square = Polygon(((49.5, 49.5), (400.5, 49.5), (400.5, 400.5), (49.5, 400.5)))
+    triangle = Polygon(((49.5, 49.5), (400.5, 49.5), (49.5, 400.5)))
+    for region in (square, triangle, Box2D(square.bbox)):
+        assert cache.one_pass_search(index, region, *query[1:], (0, 150)) == \
+            list(one_pass_search(index, region, *query[1:], (0, 150)))
+    assert cache.misses == 3
+    assert cache.one_pass_search(index, Polygon(triangle.vertices), *query[1:], (20, 120)) == \
+        list(one_pass_search(index, triangle, *query[1:], (20, 120)))
+    assert cache.partial_hits == 1
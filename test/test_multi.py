@@ -0,0 +1,35 @@
+import pytest
+
+from configs import cfg
+from indices import build_tempo_spatial_index
+from search.multi import multi_query_search
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+
+queries = [(Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)),
+           (Box2D((100, 250, 0, 500)), {0: 1}, (5, 60), (30, 120)),
+           (Box2D((0, 500, 125, 250)), {1: 2}, (3, 60), (0, 150)),
+           (Box2D((300, 320, 300, 320)), {0: 1, 1: 1}, (5, 60), (60, 90))]
+
+
+@pytest.mark.parametrize('store', ['object', 'columnar'])
+def test_multi_query_search(store):
+    config.gird_border = walk_border
+    index_cfg = cfg.clone()
+    index_cfg.INDEX.STORE = store
+    index = build_tempo_spatial_index(walk_trajs(), index_cfg)
+    res = [list(searcher) for searcher in multi_query_search(index, queries)]
+    assert res == [list(one_pass_search(index, *query)) for query in queries]
+    assert any(res)
+
+
+def test_inclusive_interval_end():
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    query = (Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 20))
+    # the last frame of an interval is searched, so are segments beginning at it
+    expected = [([13, 21, 28, 6], 15, 20), ([13, 21, 28], 13, 22)]
+    assert list(one_pass_search(index, *query)) == expected
+    assert [list(searcher) for searcher in multi_query_search(index, [query])] == [expected]
@@ -0,0 +1,46 @@
+import numpy as np
+
+from configs import cfg
+from indices import build_tempo_spatial_index
+from indices.region import occupancy_stats
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+from utilities.data_preprocessing import quantile_border
+
+
+def test_quantile_border():
+    points = np.random.default_rng(0).exponential(100, (10000, 2)).astype(int)
+    x_border, y_border = quantile_border(points, 5, 3)
+    assert x_border[0] == points[:, 0].min() and x_border[-1] == points[:, 0].max() + 1 and len(y_border) == 4
+    counts = np.histogram(points[:, 0], x_border[:-1])[0]
+    assert counts.min() > 0.9 * counts.max()
+
+
+def test_quantile_region():
+    config.gird_border = walk_border
+    index_cfg = cfg.clone()
+    index_cfg.INDEX.REGION.TYPE = 'quantile'
+    index_cfg.INDEX.REGION.GRID.SPACE = (4, 4)
+    index = build_tempo_spatial_index(walk_trajs(), index_cfg)
+    assert [len(border) for border in index.borders] == [5, 5]
+    stats = occupancy_stats(index.cell_occupancy())
+    assert stats['cells'] == 16 and stats['items'] == len(index.segments)
+    assert list(one_pass_search(index, Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)))
+
+
+def test_occupancy_rejection():
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    plain_cfg = cfg.clone()
+    plain_cfg.INDEX.OCCUPANCY.BUCKET = 0
+    plain = build_tempo_spatial_index(walk_trajs(), plain_cfg)
+    region, interval = Box2D((50, 400, 50, 400)), (0, 150)
+    assert plain.occupancy is None and index.may_match(region, {0: 1, 1: 1}, interval)
+    bound = index.occupancy.upper_bound(0, region.bbox, interval)
+    assert 0 < bound < 30 and not index.may_match(region, {0: bound + 1}, interval)
+    assert not index.may_match(Box2D((600, 700, 600, 700)), {0: 1}, interval)
+    for labels in ({0: 1, 1: 1}, {0: 3}, {0: bound + 1}, {1: 2, 0: 4}):
+        query = region, labels, (5, 60), interval
+        assert sorted(one_pass_search(index, *query)) == sorted(one_pass_search(plain, *query))
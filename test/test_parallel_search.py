@@ -0,0 +1,49 @@
+import pickle
+from multiprocessing import get_context
+
+import pytest
+
+from configs import cfg
+from indices import build_tempo_spatial_index
+from search.one_pass import one_pass_search
+from search.parallel import ShardedSearch, parallel_one_pass_search, time_shards
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+
+queries = [(Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 30), (0, 150)),
+           (Box2D((0, 500, 125, 250)), {1: 2}, (3, 40), (10, 140)),
+           (Box2D((100, 250, 0, 500)), {0: 1}, (5, 30), (30, 120))]
+
+
+def test_time_shards():
+    shards = time_shards((0, 99), (5, 19), 4)
+    assert shards == [((0, 25), (None, 24)), ((5, 50), (24, 49)), ((30, 75), (49, 74)), ((55, 99), (74, None))]
+    assert time_shards((0, 99), (5, 60), 4) == [((0, 99), (None, None))]
+
+
+@pytest.mark.parametrize('store', ['object', 'columnar'])
+def test_sharded_search(store):
+    config.gird_border = walk_border
+    index_cfg = cfg.clone()
+    index_cfg.INDEX.STORE = store
+    index = build_tempo_spatial_index(walk_trajs(), index_cfg)
+    serial = [list(one_pass_search(index, *query)) for query in queries]
+    assert any(serial)
+    with ShardedSearch(index, 2) as searcher:
+        for query, res in zip(queries, serial):
+            assert len(time_shards(query[3], query[2], 4)) > 1
+            assert list(searcher.one_pass_search(*query, shards=4)) == res
+
+
+def test_spawned_workers():
+    config.gird_border = walk_border
+    index_cfg = cfg.clone()
+    index_cfg.INDEX.STORE = 'columnar'
+    index = build_tempo_spatial_index(walk_trajs(), index_cfg)
+    index.evict(40)
+    serial = [list(one_pass_search(index, *query)) for query in queries]
+    restored = pickle.loads(pickle.dumps(index))
+    assert (restored.expired == index.expired).all()
+    assert [list(one_pass_search(restored, *query)) for query in queries] == serial
+    assert parallel_one_pass_search(index, *queries[0], workers=2, mp_context=get_context('spawn')) == serial[0]
@@ -1,6 +1,14 @@
 import numpy as np
 
-from utilities.point_relation import enclose_tester
+from configs import cfg
+from indices import build_tempo_spatial_index
+from search.multi import multi_query_search
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+from utilities.point_relation import INSIDE, OUTSIDE, PARTIAL, Polygon, enclose_all, enclose_tester, rect_relation, \
+    region_of
 
 
 def test_contain_tester():
@@ -14,3 +22,36 @@ def test_contain_tester():
     res = enclose(positive+negative)
     assert (res == np.array([True] * len(positive) + [False] * len(negative))).all()
 
+
+def test_polygon():
+    # an L shape
+    polygon = Polygon(((0, 0), (10, 0), (10, 4), (4, 4), (4, 10), (0, 10)))
+    points = np.array(((1, 1), (8, 2), (2, 8), (8, 8), (5, 5), (12, 1), (-1, 5)))
+    assert (polygon.enclose(points) == [True, True, True, False, False, False, False]).all()
+    box = Box2D((5, 9, 5, 9))
+    expected = np.column_stack((polygon.enclose(points), box.enclose(points)))
+    assert (enclose_all([polygon, box], points) == expected).all()
+    assert (region_of([box, polygon], points) == [1, 1, 1, 0, 0, -1, -1]).all()
+
+
+def test_rect_relation():
+    polygon = Polygon(((0, 0), (10, 0), (10, 4), (4, 4), (4, 10), (0, 10)))
+    lo = np.array(((1, 1), (6, 6), (3, 3), (11, 0), (-2, -2)))
+    hi = lo + (2, 2)
+    assert (rect_relation(polygon, lo, hi) == [INSIDE, OUTSIDE, PARTIAL, OUTSIDE, PARTIAL]).all()
+    # a region within a single rectangle
+    assert (rect_relation(Polygon(((1, 1), (2, 1), (1, 2))), [(0, 0)], [(5, 5)]) == [PARTIAL]).all()
+
+
+def test_polygon_search():
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    query = [{0: 1, 1: 1}, (5, 60), (0, 150)]
+    polygon = Polygon(((49.5, 49.5), (400.5, 49.5), (400.5, 400.5), (49.5, 400.5)))
+    box_res = list(one_pass_search(index, Box2D((50, 400, 50, 400)), *query))
+    assert list(one_pass_search(index, polygon, *query)) == box_res
+    lower = Polygon(((49.5, 49.5), (400.5, 49.5), (49.5, 400.5)))
+    res = list(one_pass_search(index, lower, *query))
+    assert res and res != box_res
+    assert [list(s) for s in multi_query_search(index, [(lower, *query), (polygon, *query)])] == \
+        [res, list(one_pass_search(index, polygon, *query))]
@@ -0,0 +1,68 @@
+import numpy as np
+
+from configs import cfg
+from indices import build_tempo_spatial_index
+from indices.region import GridRegion
+from indices.segments import SegmentTable
+from search.base import base_search
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+
+
+def test_from_trajs():
+    config.gird_border = walk_border
+    track = np.array([[10, 10], [20, 20], [150, 20], [160, 30], [170, 40], [420, 40], [430, 50]])
+    table = SegmentTable.from_trajs([(3, 100, 1, track)], GridRegion())
+    # the last run stays in its cell till the end, so it is not a segment
+    assert table.begins.tolist() == [100, 102]
+    assert table.lens.tolist() == [2, 3]
+    assert (table.points_of(1) == track[2:5]).all()
+    assert table.sequence_seg(0).points.tolist() == [[10, 10], [20, 20]]
+
+
+def test_from_points():
+    config.gird_border = walk_border
+    trajs = list(walk_trajs())
+    oids, fids, points = (np.concatenate(col) for col in zip(*((np.full(len(track), tid), np.arange(len(track)) + beg,
+                                                                 track) for tid, beg, _, track in trajs)))
+    label_map = {tid: label for tid, _, label, _ in trajs}
+    for fps in (1, 3):
+        strided = ((tid, beg, label, track[::fps]) for tid, beg, label, track in trajs)
+        expected = SegmentTable.from_trajs(strided, GridRegion())
+        # shuffled rows are fine
+        perm = np.random.default_rng(0).permutation(len(oids))
+        res = SegmentTable.from_points(oids[perm], fids[perm], points[perm], label_map, GridRegion(), fps)
+        for col in ('ids', 'begins', 'labels', 'lifelongs', 'offsets', 'points'):
+            assert (getattr(res, col) == getattr(expected, col)).all()
+
+
+def test_columnar_store():
+    config.gird_border = walk_border
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)]
+    objects = build_tempo_spatial_index(walk_trajs(), cfg)
+    cfg.INDEX.STORE = 'columnar'
+    try:
+        rows = build_tempo_spatial_index(walk_trajs(), cfg)
+        assert list(one_pass_search(rows, *query)) == list(one_pass_search(objects, *query))
+        cfg.INDEX.SEARCH_METHOD.TEMPO = 'FuzzySearch'
+        rows = build_tempo_spatial_index(walk_trajs(), cfg)
+        cfg.INDEX.STORE = 'object'
+        objects = build_tempo_spatial_index(walk_trajs(), cfg)
+        assert list(base_search(rows, *query)) == list(base_search(objects, *query))
+    finally:
+        cfg.INDEX.STORE = 'object'
+        cfg.INDEX.SEARCH_METHOD.TEMPO = 'FuzzyInnerAll'
+
+
+def test_parallel_build():
+    config.gird_border = walk_border
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)]
+    serial = build_tempo_spatial_index(walk_trajs(), cfg)
+    cfg.INDEX.BUILD.WORKERS, cfg.INDEX.BUILD.CELL_SHARDS = 2, 3
+    try:
+        parallel = build_tempo_spatial_index(walk_trajs(), cfg)
+    finally:
+        cfg.INDEX.BUILD.WORKERS, cfg.INDEX.BUILD.CELL_SHARDS = 1, 1
+    assert list(one_pass_search(parallel, *query)) == list(one_pass_search(serial, *query))
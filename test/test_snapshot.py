@@ -0,0 +1,51 @@
+import json
+
+from configs import cfg
+from indices import build_tempo_spatial_index, load_index, save_index
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+
+
+def test_save_load(tmp_path):
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    save_index(index, tmp_path)
+    config.gird_border = []
+    loaded = load_index(tmp_path, cfg)
+
+    assert [list(b) for b in loaded.borders] == walk_border
+    assert (loaded.segments.points == index.segments.points).all()
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)]
+    assert list(one_pass_search(loaded, *query)) == list(one_pass_search(index, *query))
+
+
+def test_load_layout(tmp_path):
+    config.gird_border = walk_border
+    columnar_cfg = cfg.clone()
+    columnar_cfg.INDEX.STORE = 'columnar'
+    index = build_tempo_spatial_index(walk_trajs(), columnar_cfg)
+    save_index(index, tmp_path)
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)]
+    expected = list(one_pass_search(index, *query))
+    assert list(one_pass_search(load_index(tmp_path, columnar_cfg), *query)) == expected
+    assert list(one_pass_search(load_index(tmp_path, cfg), *query)) == expected
+
+    # a snapshot without the layout is indexed again
+    (tmp_path / 'layout_rows.npy').unlink()
+    (tmp_path / 'layout_cells.npy').unlink()
+    meta = json.loads((tmp_path / 'meta.json').read_text())
+    (tmp_path / 'meta.json').write_text(json.dumps({**meta, 'version': 1}))
+    assert list(one_pass_search(load_index(tmp_path, columnar_cfg), *query)) == expected
+
+
+def test_save_evicted(tmp_path):
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    index.evict(40)
+    save_index(index, tmp_path)
+    loaded = load_index(tmp_path, cfg)
+    assert (loaded.expired == index.expired).all()
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)]
+    assert list(one_pass_search(loaded, *query)) == list(one_pass_search(index, *query))
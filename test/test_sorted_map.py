@@ -0,0 +1,28 @@
+import numpy as np
+
+from indices.sorted_map import SortedMap, SortedMultiMap
+
+
+def test_sorted_map():
+    smap = SortedMap()
+    for key in [5, 1, 9, 5]:
+        smap.add(key, str(key) * 2 if key == 5 and smap.where_contain(5) else str(key))
+    assert list(smap) == [(1, '1'), (5, '55'), (9, '9')]
+    assert smap.where_contain(9) == '9' and smap.where_contain(4) is None
+    assert smap.where_intersect((1, 9)) == ['1', '55']  # the upper bound is exclusive
+    smap.extend([9, 3, 3], ['x', 'a', 'b'])
+    assert list(smap) == [(1, '1'), (3, 'b'), (5, '55'), (9, 'x')]
+
+
+def test_sorted_multi_map():
+    mmap = SortedMultiMap()
+    mmap.extend(np.array([4, 4, 7]), np.array([10, 11, 12]))
+    mmap.extend([10, 12], ['a', 'b'])  # appended
+    mmap.add(4, 13)
+    mmap.extend([0, 7], [14, 15])
+    assert list(mmap) == [(0, 14), (4, 10), (4, 11), (4, 13), (7, 12), (7, 15), (10, 'a'), (12, 'b')]
+    assert mmap.where_contain(4) == 10 and mmap.where_intersect((4, 10)) == [10, 11, 13, 12, 15]
+    other = SortedMultiMap()
+    other.extend([4], [16])
+    mmap.merge(other)
+    assert mmap.where_intersect((4, 5)) == [10, 11, 13, 16]
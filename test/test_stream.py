@@ -0,0 +1,95 @@
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+import pytest
+
+from configs import cfg
+from indices import build_tempo_spatial_index
+from indices.retention import RetentionPolicy
+from indices.stream import StreamingIndex
+from indices.tempo_spatial import TempoSpatialIndex
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+
+
+def test_streaming_index():
+    config.gird_border = walk_border
+    trajs = list(walk_trajs())
+    points = sorted((beg + i, tid, label, point) for tid, beg, label, track in trajs for i, point in enumerate(track))
+    stream = StreamingIndex(TempoSpatialIndex(cfg), patience=5, flush_size=4)
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 80)]
+    for fid, frame in groupby(points, key=itemgetter(0)):
+        _, oids, labels, locs = zip(*frame)
+        stream.append(fid, oids, labels, np.array(locs))
+        if fid == 70:
+            with pytest.raises(ValueError):
+                stream.query(one_pass_search, *query)
+    stream.close()
+
+    expected = build_tempo_spatial_index(trajs, cfg)
+    assert stream.query(one_pass_search, *query) == list(one_pass_search(expected, *query))
+    assert len(stream.index.segments) == len(expected.segments)
+
+
+def test_retention():
+    config.gird_border = walk_border
+    index = build_tempo_spatial_index(walk_trajs(), cfg)
+    segments = index.segments
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (100, 150)]
+    expected = list(one_pass_search(index, *query))
+
+    eviction = RetentionPolicy(max_frames=60).apply(index, 150)
+    assert eviction.horizon == 90 and eviction.segments > 0 and eviction.nbytes > 0
+    assert (index.segments.begins + index.segments.lens > 90).all()
+    assert len(index.segments) + eviction.segments == len(segments)
+    assert list(one_pass_search(index, *query)) == expected
+
+    eviction = RetentionPolicy(max_bytes=index.segments.nbytes // 2).apply(index, 150)
+    assert index.segments.nbytes <= eviction.nbytes
+
+
+def test_query_watermark():
+    config.gird_border = walk_border
+    # an object of a queried label staying far longer than the queried durations
+    trajs = list(walk_trajs()) + [(100, 0, 0, np.full((160, 2), 60))]
+    points = sorted((beg + i, tid, label, point) for tid, beg, label, track in trajs for i, point in enumerate(track))
+    stream = StreamingIndex(TempoSpatialIndex(cfg), patience=5, flush_size=4)
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 30)]
+    for fid, frame in groupby(points, key=itemgetter(0)):
+        _, oids, labels, locs = zip(*frame)
+        stream.append(fid, oids, labels, np.array(locs))
+        if fid == 100:
+            break
+    assert stream.watermark == 0 and stream.query_watermark({0: 1, 1: 1}, (5, 60)) == 40
+    assert stream.query_watermark({0: 1}, (5, 200)) == 0
+    expected = build_tempo_spatial_index(trajs, cfg)
+    assert stream.query(one_pass_search, *query) == list(one_pass_search(expected, *query))
+    with pytest.raises(ValueError):
+        stream.query(one_pass_search, query[0], query[1], (5, 200), query[3])
+
+
+def test_evict_in_place():
+    config.gird_border = walk_border
+    query = [Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)]
+    for store, tempo in (('object', 'FuzzyInnerAll'), ('columnar', 'FuzzyInnerAll'), ('columnar', 'IntervalInnerAll')):
+        index_cfg = cfg.clone()
+        index_cfg.INDEX.STORE, index_cfg.INDEX.SEARCH_METHOD.TEMPO = store, tempo
+        index = build_tempo_spatial_index(walk_trajs(), index_cfg)
+        segments = index.segments
+        ends = segments.begins + segments.lens
+        dropped, nbytes = index.evict(40)
+        assert dropped == (ends <= 40).sum() and nbytes == 0 and index.segments is segments
+        assert index.evict(40) == (0, 0)
+
+        expected = TempoSpatialIndex(index_cfg)
+        expected.add_table(segments.take(ends > 40))
+        assert list(one_pass_search(index, *query)) == list(one_pass_search(expected, *query))
+        assert (index.cell_occupancy() == expected.cell_occupancy()).all()
+
+        # compacted once expired rows are as many as the others
+        dropped, nbytes = index.evict(100)
+        assert nbytes > 0 and len(index.segments) == (ends > 100).sum() and not index.expired.any()
+        assert (index.segments.begins + index.segments.lens > 100).all()
@@ -0,0 +1,15 @@
+import numpy as np
+
+from utilities.synthetic import synthetic_tracks
+
+
+def test_synthetic_tracks():
+    data, cols, cls_map, (xmin, xmax, ymin, ymax) = synthetic_tracks(50, 300, labels=[1, 0, 1], life=(10, 100))
+    assert list(data.columns[:4]) == cols and len(cls_map) == 50
+    assert np.all(np.diff(data['fid']) >= 0)
+    assert data['x'].between(xmin, xmax).all() and data['y'].between(ymin, ymax).all()
+    assert set(data['cls']) <= {0, 2}
+    for oid, track in data.groupby('oid'):
+        assert np.all(np.diff(track['fid']) == 1) and 10 <= len(track) <= 100
+        assert (track['cls'] == cls_map[oid]).all()
+    assert data.equals(synthetic_tracks(50, 300, labels=[1, 0, 1], life=(10, 100))[0])
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from configs import cfg
+from indices import build_tempo_spatial_index
+from indices.sorted_map import SortedMap, SortedMultiMap
+from indices.temporal import IntervalIndex
+from indices.two_level_merge_index import TwoLevelMergeIndex
+from search.one_pass import one_pass_search
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+
+
+@pytest.mark.parametrize('strategy', ['InnerAll', 'Search'])
+def test_interval_index(strategy):
+    rng = np.random.default_rng(3)
+    fuzzy = TwoLevelMergeIndex(SortedMap, SortedMultiMap, 'Fuzzy' + strategy)
+    interval = IntervalIndex('Interval' + strategy)
+    for duration in rng.integers(1, 80, 20).tolist():
+        begins = np.sort(rng.integers(0, 1000, 30))
+        entries = [f'{duration}-{begin}' for begin in begins.tolist()]
+        fuzzy.inner(duration).extend(begins, entries)
+        interval.inner(duration).extend(begins, entries)
+    for lo, hi in [(0, 1000), (500, 510), (999, 2000), (-100, 0), (300, 300)]:
+        expected = list(fuzzy.where_intersect((lo, hi)))
+        if strategy == 'InnerAll':  # groups are merged by begin, then by the order of groups
+            expected = [sorted((entry for group in expected for entry in group), key=lambda e: int(e.split('-')[1]))]
+            expected = [group for group in expected if group]
+        else:
+            expected = sorted(expected)
+        found = interval.where_intersect((lo, hi))
+        assert (found if strategy == 'InnerAll' else sorted(found)) == expected
+
+
+def test_interval_search():
+    config.gird_border = walk_border
+    query = Box2D((50, 400, 50, 400)), {0: 1, 1: 1}, (5, 60), (0, 150)
+    index_cfg = cfg.clone()
+    index_cfg.INDEX.SEARCH_METHOD.TEMPO = 'IntervalInnerAll'
+    index = build_tempo_spatial_index(walk_trajs(), index_cfg)
+    assert list(one_pass_search(index, *query)) == list(one_pass_search(build_tempo_spatial_index(walk_trajs(), cfg),
+                                                                        *query))
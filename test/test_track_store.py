@@ -0,0 +1,26 @@
+import numpy as np
+
+from utilities.data_preprocessing import traj_data
+from utilities.synthetic import synthetic_tracks
+from utilities.track_store import TrackStore, save_tracks
+
+
+def same_trajs(res, ans):
+    res, ans = list(res), list(ans)
+    assert len(res) == len(ans)
+    for (tid, beg, cls_id, track), (tid_, beg_, cls_id_, track_) in zip(res, ans):
+        assert (tid, beg, cls_id) == (tid_, beg_, cls_id_) and np.array_equal(track, track_)
+
+
+def test_track_store(tmp_path):
+    data, cols, cls_map, _ = synthetic_tracks(60, 400, life=(10, 150))
+    save_tracks(tmp_path, data, cols, cls_map)
+    store = TrackStore(tmp_path)
+    assert len(store) == len(data) and store.label_map.equals(cls_map.rename_axis(None))
+
+    for chunk in (1, 100, 1 << 20):
+        same_trajs(store.trajs(3, 2, chunk=chunk), traj_data(data, cols, 3, cls_map, 2))
+        same_trajs(store.trajs(2, 1, frames=(100, 250), chunk=chunk),
+                   traj_data(data.query('100 <= fid <= 250'), cols, 2, cls_map, 1))
+    loaded, *_ = store.read((100, 250))
+    assert loaded.equals(data.query('100 <= fid <= 250').reset_index(drop=True))
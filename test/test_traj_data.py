@@ -0,0 +1,29 @@
+import numpy as np
+
+from utilities.data_preprocessing import traj_data, traj_interp, view_field
+from utilities.synthetic import synthetic_tracks
+
+
+def test_traj_data():
+    data, cols, cls_map, _ = synthetic_tracks(80, 300, life=(5, 100))
+    trajs = traj_data(data.sample(frac=1, random_state=0), cols, 3, cls_map, scale=2)
+    assert len(trajs) == 80 and np.array_equal(trajs.bbox, view_field(data, 'x', 'y', 2))
+    for (tid, beg, cls_id, track), (oid, t) in zip(trajs, data.groupby('oid')):
+        assert (tid, beg, cls_id) == (oid, t['fid'].iat[0], cls_map[oid])
+        assert track.dtype == np.int32 and np.array_equal(track, t[['x', 'y']][::3].to_numpy() * 2)
+
+
+def test_traj_interp():
+    # [oid, cls, fid, x1, y1, x2, y2]
+    detections = np.array([[7, 1, 13, 10, 0, 30, 40],
+                           [3, 2, 5, 0, 10, 10, 20],
+                           [7, 2, 10, 0, 0, 20, 10],
+                           [3, 2, 6, 10, 10, 20, 30],
+                           [7, 2, 14, 20, 0, 40, 41],
+                           [7, 1, 12, 10, 0, 20, 20]])
+    res = traj_interp(detections)
+    assert res['fid'].tolist() == [5, 6, 10, 11, 12, 13, 14]
+    assert res['oid'].tolist() == [3, 3, 7, 7, 7, 7, 7] and res['cls'].tolist() == [2, 2, 1, 1, 1, 1, 1]
+    assert res['x'].tolist() == [5, 15, 10, 12, 15, 20, 30]
+    assert res['y'].tolist() == [20, 30, 10, 15, 20, 40, 41]
+    assert traj_interp(detections, center=True)['y'].tolist() == [15, 20, 5, 7, 10, 20, 20]
@@ -1,20 +1,25 @@
 from functools import partial
 
-from btree import BtreeMap, BtreeMultiMap
-
 from indices.region import GridRegion, unsure
-from test.test_helper import *
+from indices.sorted_map import SortedMap, SortedMultiMap
+from test.region_test_vars import *
 from indices.two_level_merge_index import TwoLevelMergeIndex
 
+# keys of `Out3D` are (loc, duration)
+loc_keys = [(key.loc, key.duration) for key in keys]
+
 
 class TestIndices:
-    Out3D = partial(TwoLevelMergeIndex, GridRegion, BtreeMap)
-    Tempo2D = partial(TwoLevelMergeIndex, BtreeMap, BtreeMultiMap)
-    Tempo2D_fuzzy = partial(TwoLevelMergeIndex, BtreeMap, BtreeMultiMap, 'FuzzySearch')
+    Out3D = partial(TwoLevelMergeIndex, GridRegion, SortedMap)
+    Tempo2D = partial(TwoLevelMergeIndex, SortedMap, SortedMultiMap)
+    Tempo2D_fuzzy = partial(TwoLevelMergeIndex, SortedMap, SortedMultiMap, 'FuzzySearch')
+
+    def setup_method(self):
+        config.gird_border = border  # other tests may replace it
 
     def test_out3d(self):
         out3d = self.Out3D()
-        for key, obj, in zip(keys, objs):
+        for key, obj, in zip(loc_keys, objs):
             out3d.add(key, obj)
             assert out3d.where_contain(key) is obj
 
@@ -33,7 +38,7 @@ class TestIndices:
 
     def test_user_idx(self):
         user_idx = TwoLevelMergeIndex(self.Out3D, self.Tempo2D)
-        for *key, entry in zip(keys, zip(durations, begin), content):
+        for *key, entry in zip(loc_keys, zip(durations, begin), content):
             user_idx.add(key, entry)
             assert user_idx.where_contain(key) == entry
         # search
@@ -42,24 +47,24 @@ class TestIndices:
 
     def test_fuzzy(self):
         fuzzy_user = TwoLevelMergeIndex(self.Out3D, self.Tempo2D_fuzzy)
-        for *key, entry in zip(keys, zip(durations, begin), content):
+        for *key, entry in zip(loc_keys, zip(durations, begin), content):
             fuzzy_user.add(key, entry)
         res = list(fuzzy_user.where_intersect([((15, 30, 16, 70), (10, 110)), (46, 67)]))
         assert len(res) == 3
 
     def test_fuzzy_inner_all(self):
-        fuzzy_tempo_inner_all = partial(TwoLevelMergeIndex, BtreeMap, BtreeMultiMap, 'FuzzyInnerAll')
+        fuzzy_tempo_inner_all = partial(TwoLevelMergeIndex, SortedMap, SortedMultiMap, 'FuzzyInnerAll')
         user_idx = TwoLevelMergeIndex(self.Out3D, fuzzy_tempo_inner_all)
-        for *key, entry in zip(keys, zip(durations, begin), content):
+        for *key, entry in zip(loc_keys, zip(durations, begin), content):
             user_idx.add(key, entry)
         tempo_set = user_idx.where_intersect([((15, 30, 16, 70), (10, 110)), (46, 67)])
         res = [entry for temp in tempo_set for entry in temp]
         assert len(res) == 3
 
     def test_perhaps_intersect(self):
-        out3D = partial(TwoLevelMergeIndex, unsure(GridRegion), BtreeMap, 'NotSureSearch')
+        out3D = partial(TwoLevelMergeIndex, unsure(GridRegion), SortedMap, 'NotSureSearch')
         user_perhaps = TwoLevelMergeIndex(out3D, self.Tempo2D_fuzzy, 'NotSureSearch')
-        for *key, entry in zip(keys, zip(durations, begin), content):
+        for *key, entry in zip(loc_keys, zip(durations, begin), content):
             user_perhaps.add(key, entry)
         candidates, probation = user_perhaps.where_intersect([((15, 30, 16, 70), (10, 110)), (46, 67)])
         assert len(list(candidates)) == 0
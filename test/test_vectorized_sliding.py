@@ -0,0 +1,16 @@
+import pytest
+
+from search.baseline.search_methods import sliding_framework
+from utilities.box2D import Box2D
+from utilities.synthetic import synthetic_tracks
+
+data, *_ = synthetic_tracks(100, 400, density=30., life=(20, 200))
+
+
+@pytest.mark.parametrize('labels,duration', [({0: 1}, (5, 100)), ({0: 2, 1: 1}, (3, 100)), ({2: 1}, (1, 100))])
+def test_vectorized_sliding(labels, duration):
+    region = Box2D((300, 1500, 200, 1300))
+    res = [(pat.labels, pat.interval) for pat in sliding_framework(data, region, labels, duration, (50, 350),
+                                                                    method='vectorized')]
+    assert res == [(pat.labels, pat.interval) for pat in sliding_framework(data, region, labels, duration, (50, 350))]
+    assert res
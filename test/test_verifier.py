@@ -0,0 +1,47 @@
+import heapq
+from functools import partial
+from operator import attrgetter
+
+import numpy as np
+
+from indices.region import GridRegion
+from indices.segments import SegmentTable
+from search.verifier import candidate_verified_queue, verified_queue, verify_row, verify_seg
+from test.index_test_helper import walk_border, walk_trajs
+from utilities.box2D import Box2D
+from utilities.config import config
+from utilities.point_relation import Polygon
+from utilities.trajectory import TrajectoryIntervalSeg
+
+
+def test_batch_verification():
+    config.gird_border = walk_border
+    table = SegmentTable.from_trajs(walk_trajs(60), GridRegion())
+    rows = np.argsort(table.begins, kind='stable')
+    segs = [table.sequence_seg(row) for row in rows.tolist()]
+    for region in (Box2D((50, 400, 50, 400)), Polygon([(0, 0), (450, 100), (200, 480)])):
+        for duration in (1, 5, 20):
+            expected = list(verified_queue(segs, partial(verify_seg, region=region, duration=duration),
+                                           attrgetter('begin')))
+            assert expected
+            assert list(candidate_verified_queue(iter(segs), region, duration)) == expected
+            assert list(candidate_verified_queue(rows.tolist(), region, duration, table)) == expected
+            # candidates merged from groups, as `sequential_search` passes them
+            groups = [rows[:len(rows) // 2], rows[len(rows) // 2:]]
+            merged = heapq.merge(*(group[np.argsort(table.begins[group], kind='stable')].tolist()
+                                   for group in groups), key=table.begins.__getitem__)
+            by_row = list(verified_queue(merged, partial(verify_row, table, region=region, duration=duration),
+                                         table.begins.__getitem__))
+            merged = heapq.merge(*(group[np.argsort(table.begins[group], kind='stable')].tolist()
+                                   for group in groups), key=table.begins.__getitem__)
+            assert list(candidate_verified_queue(merged, region, duration, table)) == by_row
+    assert list(candidate_verified_queue(iter([]), Box2D((0, 1, 0, 1)), 1)) == []
+
+
+def test_verified_queue_order():
+    rng = np.random.default_rng(0)
+    begins = np.sort(rng.integers(0, 50, 300)).tolist()
+    found = [[TrajectoryIntervalSeg(cand, begin + offset, 0, 1) for offset in sorted(rng.integers(0, 100, 2).tolist())]
+             for cand, begin in enumerate(begins)]
+    res = list(verified_queue(range(len(begins)), found.__getitem__, begins.__getitem__))
+    assert res == sorted((part for parts in found for part in parts), key=attrgetter('begin'))
@@ -1,5 +1,7 @@
 import numpy as np
 
+from utilities.point_relation import enclose_meta, parallelogram_meta
+
 
 class Box2D:
     def __init__(self, bbox):
@@ -11,6 +13,12 @@ class Box2D:
         self._test_meta = None
         self._meta()
 
+    def __eq__(self, other):
+        return type(other) is Box2D and tuple(self.bbox) == tuple(other.bbox)
+
+    def __hash__(self):
+        return hash(tuple(self.bbox))
+
     def _point_rep(self):
         """
         transform bbox into 3 points to represent a box
@@ -31,13 +39,12 @@ class Box2D:
         build useful data for testing if a point within this box
         :return: None
         """
-        points_rep = self._point_rep()
-        reference = np.empty((4, len(points_rep[0])))
-        vectors = points_rep[1:] - points_rep[0]  # [BA, BC].T
-        reference[:2] = vectors.T
-        reference[2] = np.diag(vectors @ vectors.T)  # [BA@BA, BC@BC]
-        reference[3] = points_rep[0]
-        self._test_meta = reference
+        self._test_meta = parallelogram_meta(self._point_rep())
+
+    @property
+    def vertices(self):
+        xmin, xmax, ymin, ymax = self.bbox
+        return np.array(((xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)), dtype=float)
 
     def enclose(self, points):
         """
@@ -45,8 +52,19 @@ class Box2D:
         :param points: 2d points, iterable
         :return: boolean array
         """
-        stats = points - self._test_meta[-1]  # BP
-        stats = stats @ self._test_meta[:2]  # [BP@BA.T, BP@BC.T]
+        return enclose_meta(self._test_meta, points)
+
+    @staticmethod
+    def enclose_each(boxes, points, which):
+        """
+        test points against many boxes at once
+        :param boxes: sequence of `Box2D`
+        :param points: 2d points, array of shape (n, 2)
+        :param which: index of the box each point is tested against
+        :return: boolean array of shape (n,)
+        """
+        meta = np.stack([box._test_meta for box in boxes])[which]  # (n, 4, 2)
+        stats = np.einsum('ni,nij->nj', points - meta[:, 3], meta[:, :2])  # [BP@BA.T, BP@BC.T] of every point
         mask = stats >= 0
-        mask &= stats <= self._test_meta[2]  # [BP@BA < BA@BA, BP@BC < BC@BC]
+        mask &= stats <= meta[:, 2]
         return mask.all(axis=1)
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 
 
 def view_field(object_tb, x_name, y_name, scale=1):
@@ -17,13 +18,38 @@ def traj_data(tracks, cols_name: list, fps, label_map, scale=100):
     :param scale: the unit of our coordinate is 'cm', tell us how we scale raw (x, y).
     :return: trajectories tuple with format ('TrajTrace', 'tId start_frame track') and points of all trajectories.
     """
-    tracks = tracks[cols_name]
-    traces_by_id = tracks.groupby(cols_name[0])
-    for tid, t in traces_by_id:
-        cls_id = label_map[tid]
-        start_frame = t[cols_name[1]].iat[0]
-        trajs = (t[cols_name[-2:]][::fps].to_numpy() * scale).astype(np.int32)
-        yield tid, start_frame,  cls_id,  trajs
+    return TrajData(tracks, cols_name, fps, label_map, scale)
+
+
+class TrajData:
+    def __init__(self, tracks, cols_name: list, fps, label_map, scale=100):
+        """
+        trajectories of all objects extracted at once, see `traj_data`.
+        Tracks are views into a single int32 buffer, and `bbox` is the field of all scaled points.
+        """
+        oids, fids = (tracks[col].to_numpy() for col in cols_name[:2])
+        order = np.lexsort((fids, oids))
+        oids = oids[order]
+        points = (tracks[cols_name[-2:]].to_numpy()[order] * scale).astype(np.int32)
+        self.bbox = np.concatenate((points.min(axis=0), points.max(axis=0)))[[0, 2, 1, 3]] if len(points) else None
+
+        starts = np.flatnonzero(np.diff(oids, prepend=oids[:1] - 1))
+        counts = np.diff(starts, append=len(oids))
+        keep = np.arange(len(oids)) - np.repeat(starts, counts)
+        keep = keep % fps == 0
+        self.points = points[keep]
+        self.offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+        np.cumsum((counts + fps - 1) // fps, out=self.offsets[1:])
+        self.ids, self.begins = oids[starts], fids[order[starts]]
+        self.labels = pd.Series(label_map).reindex(self.ids).to_numpy()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        offsets = self.offsets.tolist()
+        for i, (tid, beg, cls_id) in enumerate(zip(self.ids, self.begins, self.labels)):
+            yield tid, beg, cls_id, self.points[offsets[i]:offsets[i + 1]]
 
 
 def gen_border(bbox, x_num, y_num):
@@ -35,6 +61,21 @@ def gen_border(bbox, x_num, y_num):
     return x_series, y_series
 
 
+def quantile_border(points, x_num, y_num):
+    """
+    borders splitting points evenly rather than space, in the same format as `gen_border`.
+    Borders falling on the same coordinate are merged, thus there may be fewer cells than asked.
+    :param points: 2d points, array of shape (n, 2)
+    :param x_num: the number of borders in x
+    :param y_num: the number of borders in y
+    """
+    res = []
+    for dim, num in zip(np.asarray(points).T, (x_num, y_num)):
+        series = np.unique(np.quantile(dim, np.linspace(0, 1, num)).astype(int))
+        res.append(np.append(series, series[-1] + 1))
+    return tuple(res)
+
+
 def draw_traj_point_in_grid(data, reg_borders):
     import matplotlib.pyplot as plt
     from matplotlib.ticker import FixedLocator
@@ -54,31 +95,59 @@ def group_by_frame(df, interval):
 
 
 def traj_interp(np_arr, center=False):
-    import pandas as pd
-
-    np_arr[:, 3] += np_arr[:, 5]
-    np_arr[:, 3] //= 2
-    if center:
-        np_arr[:, 6] += np_arr[:, 4]
-        np_arr[:, 6] //= 2
+    """
+    turn detections into points of objects and linearly interpolate frames missing in the middle of an object.
+    Every object is given its most frequent class, the least one on ties.
+    Objects are independent, so detections can be split by object ids and processed in parts.
+    :param np_arr: detections with columns [oid, cls, fid, x1, y1, x2, y2]
+    :param center: use the center of a box as its point, otherwise the middle of its bottom
+    :return: data frame with columns [fid, oid, cls, x, y] sorted by (oid, fid)
+    """
+    header = ['fid', 'oid', 'cls', 'x', 'y']
+    np_arr = np.asarray(np_arr)
+    if not len(np_arr):
+        return pd.DataFrame(columns=header)
+    oids, cls, fids = np_arr[:, 0], np_arr[:, 1], np_arr[:, 2].astype(np.int64)
+    xs = (np_arr[:, 3] + np_arr[:, 5]) // 2
+    ys = (np_arr[:, 6] + np_arr[:, 4]) // 2 if center else np_arr[:, 6]
 
-    header = ['oid', 'cls', 'fid', 'x', 'y']
-    # sort by oid
-    np_arr = np_arr[:, [0, 1, 2, 3, 6]][np.argsort(np_arr[:, 0])]
     # group by objects
-    diff = np.diff(np_arr[:, 0], prepend=np_arr[0, 0]).nonzero()[0]
-    group_by_id = np.split(np_arr, diff)
-    interp_ls = []
-    for group in group_by_id:
-        df_interp = pd.DataFrame(group, columns=header)
-        min_, max_, mode = df_interp['fid'].min(), df_interp['fid'].max(), df_interp['cls'].mode()[0]
-        df_interp['cls'] = mode  # revise class id
-        df_interp = df_interp.set_index('fid').reindex(np.arange(int(min_), int(max_) + 1))
-        if df_interp['x'].isna().values.any():  # interpolate
-            df_interp.interpolate(inplace=True)
-        interp_ls.append(df_interp.reset_index())
-    df = pd.concat(interp_ls, ignore_index=True, copy=False)
-    return df.astype({'oid': np.int32, 'cls': np.int16, 'x': np.int32, 'y': np.int32})
+    order = np.lexsort((fids, oids))
+    oids, fids, xs, ys = oids[order], fids[order], xs[order], ys[order]
+    new_obj = np.empty(len(oids), dtype=bool)
+    new_obj[0] = True
+    np.not_equal(oids[1:], oids[:-1], out=new_obj[1:])
+    if np.any(fids[1:][~new_obj[1:]] == fids[:-1][~new_obj[1:]]):
+        raise ValueError('an object is detected more than once in a frame')
+    starts = np.flatnonzero(new_obj)
+    obj_of = np.cumsum(new_obj) - 1
+    first, last = fids[starts], fids[np.append(starts[1:], len(fids)) - 1]
+    lens = last - first + 1
+    offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+
+    # the first and the last frame of an object are always detected, so interpolation never crosses objects
+    known = offsets[obj_of] + fids - first[obj_of]
+    full = np.arange(offsets[-1])
+    return pd.DataFrame({'fid': full - np.repeat(offsets[:-1] - first, lens),
+                         'oid': np.repeat(oids[starts], lens).astype(np.int32),
+                         'cls': np.repeat(_mode_of(obj_of, cls[order]), lens).astype(np.int16),
+                         'x': np.interp(full, known, xs).astype(np.int32),
+                         'y': np.interp(full, known, ys).astype(np.int32)}, columns=header)
+
+
+def _mode_of(group, values):
+    """
+    :param group: ascending group ids from 0
+    :return: the most frequent value of every group, the least one on ties
+    """
+    order = np.lexsort((values, group))
+    group, values = group[order], values[order]
+    run_starts = np.flatnonzero((np.diff(group, prepend=-1) != 0) | (np.diff(values, prepend=values[:1] - 1) != 0))
+    run_lens = np.diff(run_starts, append=len(values))
+    runs = np.lexsort((values[run_starts], -run_lens, group[run_starts]))
+    best = runs[np.diff(group[run_starts][runs], prepend=-1) != 0]
+    return values[run_starts][best]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,179 @@
+from functools import partial
+
+import numpy as np
+
+# how a grid cell relates to a region, see `rect_relation`
+OUTSIDE, PARTIAL, INSIDE = 0, 1, 2
+
+
+def parallelogram_meta(region_points):
+    """
+    build useful data for testing if a point within a parallelogram
+    :param region_points: 3 points (B, A, C) representing a parallelogram, see `Box2D._point_rep`
+    :return: [BA, BC].T, [BA@BA, BC@BC] and B stacked in an array of shape (4, 2)
+    """
+    region_points = np.asarray(region_points, dtype=float)
+    reference = np.empty((4, region_points.shape[1]))
+    vectors = region_points[1:] - region_points[0]  # [BA, BC].T
+    reference[:2] = vectors.T
+    reference[2] = np.diag(vectors @ vectors.T)  # [BA@BA, BC@BC]
+    reference[3] = region_points[0]
+    return reference
+
+
+def enclose_meta(meta, points):
+    """
+    test whether points are in a parallelogram
+    :param meta: returned by `parallelogram_meta`
+    :param points: 2d points, iterable
+    :return: boolean array
+    """
+    stats = np.asarray(points) - meta[-1]  # BP
+    stats = stats @ meta[:2]  # [BP@BA.T, BP@BC.T]
+    mask = stats >= 0
+    mask &= stats <= meta[2]  # [BP@BA < BA@BA, BP@BC < BC@BC]
+    return mask.all(axis=1)
+
+
+def enclose_tester(region_points):
+    """
+    :param region_points: 3 points (B, A, C) representing a parallelogram, see `Box2D._point_rep`
+    :return: a function testing whether points are in the parallelogram
+    """
+    return partial(enclose_meta, parallelogram_meta(region_points))
+
+
+class Polygon:
+    def __init__(self, vertices):
+        """
+        build a simple polygon, either convex or concave
+        :param vertices: corners in order, the last one connects to the first
+        """
+        self.vertices = np.asarray(vertices, dtype=float)
+        lo, hi = self.vertices.min(axis=0).tolist(), self.vertices.max(axis=0).tolist()
+        self.bbox = (lo[0], hi[0], lo[1], hi[1])
+        self.edges = np.stack((self.vertices, np.roll(self.vertices, -1, axis=0)), axis=1)  # (edge, end, dim)
+
+    def __eq__(self, other):
+        return type(other) is Polygon and np.array_equal(self.vertices, other.vertices)
+
+    def __hash__(self):
+        return hash(tuple(self.vertices.ravel().tolist()))
+
+    def enclose(self, points):
+        """
+        test whether points are in this polygon by the even-odd rule. Points on edges may be either in or out.
+        :param points: 2d points, iterable
+        :return: boolean array
+        """
+        return _crossings(self.edges, np.asarray(points, dtype=float)[:, None]).sum(axis=1) % 2 == 1
+
+    @staticmethod
+    def enclose_each(polygons, points, which):
+        """
+        test points against many polygons at once
+        :param polygons: sequence of `Polygon`
+        :param points: 2d points, array of shape (n, 2)
+        :param which: index of the polygon each point is tested against
+        :return: boolean array of shape (n,)
+        """
+        edge_num = max(len(polygon.edges) for polygon in polygons)
+        # pad with zero length edges, which are never crossed
+        edges = np.stack([np.concatenate((polygon.edges,
+                                          np.broadcast_to(polygon.vertices[0], (edge_num - len(polygon.edges), 2, 2))))
+                          for polygon in polygons])
+        return _crossings(edges[which], np.asarray(points, dtype=float)[:, None]).sum(axis=1) % 2 == 1
+
+
+def _crossings(edges, points):
+    """
+    :param edges: array of shape (..., edge, 2, 2)
+    :param points: array broadcastable to (..., 1, 2)
+    :return: whether a horizontal ray from a point to its right crosses an edge, of shape (..., edge)
+    """
+    (x0, y0), (x1, y1) = np.moveaxis(edges[..., 0, :], -1, 0), np.moveaxis(edges[..., 1, :], -1, 0)
+    x, y = points[..., 0], points[..., 1]
+    straddle = (y0 > y) != (y1 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return straddle & (x < x_cross)
+
+
+def enclose_each(regions, points, which):
+    """
+    test points against many regions at once, regions of the same type are tested in a single call
+    :param regions: sequence of regions, whose type implements `enclose_each`, such as `Box2D` and `Polygon`
+    :param points: 2d points, array of shape (n, 2)
+    :param which: index of the region each point is tested against
+    :return: boolean array of shape (n,)
+    """
+    kinds = {}
+    for i, region in enumerate(regions):
+        kinds.setdefault(type(region), []).append(i)
+    if len(kinds) == 1:
+        return type(regions[0]).enclose_each(regions, points, which)
+    res = np.empty(len(points), dtype=bool)
+    for kind, ids in kinds.items():
+        local = np.full(len(regions), -1)
+        local[ids] = np.arange(len(ids))
+        mask = local[which] >= 0
+        res[mask] = kind.enclose_each([regions[i] for i in ids], points[mask], local[which[mask]])
+    return res
+
+
+def enclose_all(regions, points):
+    """
+    :param regions: see `enclose_each`
+    :param points: 2d points, array of shape (n, 2)
+    :return: boolean array of shape (n, len(regions)), whether a point is in a region
+    """
+    points = np.asarray(points)
+    which = np.tile(np.arange(len(regions)), len(points))
+    return enclose_each(regions, np.repeat(points, len(regions), axis=0), which).reshape(len(points), len(regions))
+
+
+def region_of(regions, points):
+    """
+    :return: the index of the first region that each point is in, -1 for none
+    """
+    mask = enclose_all(regions, points)
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def rect_relation(region, lo, hi):
+    """
+    classify axis aligned rectangles by how they overlap with region
+    :param region: a region with `enclose` and `vertices`
+    :param lo: lower corners of rectangles, array of shape (n, 2)
+    :param hi: upper corners of rectangles, rectangles are closed
+    :return: array of OUTSIDE, PARTIAL or INSIDE
+    """
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    corners = np.stack((lo, np.column_stack((hi[:, 0], lo[:, 1])), hi, np.column_stack((lo[:, 0], hi[:, 1]))), axis=1)
+    corner_in = region.enclose(corners.reshape(-1, 2)).reshape(-1, 4)
+    vertices = np.asarray(region.vertices, dtype=float)
+    touched = _edges_touch(np.stack((vertices, np.roll(vertices, -1, axis=0)), axis=1), lo, hi).any(axis=1)
+    res = np.full(len(lo), OUTSIDE, dtype=np.int8)
+    res[corner_in.any(axis=1) | touched] = PARTIAL
+    res[corner_in.all(axis=1) & ~touched] = INSIDE
+    return res
+
+
+def _edges_touch(edges, lo, hi):
+    """
+    Liang-Barsky clipping of every edge against every closed rectangle
+    :return: boolean array of shape (rectangle, edge)
+    """
+    start, delta = edges[:, 0], edges[:, 1] - edges[:, 0]
+    t0, t1 = np.zeros((len(lo), len(edges))), np.ones((len(lo), len(edges)))
+    touched = np.ones_like(t0, dtype=bool)
+    for dim in range(edges.shape[-1]):
+        for p, q in ((-delta[:, dim], start[:, dim] - lo[:, dim, None]),
+                     (delta[:, dim], hi[:, dim, None] - start[:, dim])):
+            p = np.broadcast_to(p, q.shape)
+            touched &= (p != 0) | (q >= 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r = q / p
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+    return touched & (t0 <= t1)
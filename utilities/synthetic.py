@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from utilities.data_preprocessing import gen_border
+
+
+def synthetic_tracks(objects=1000, frames=3000, labels=3, density=5., life=(50, 500), speed=8., seed=0):
+    """
+    generate random trajectories like those `dataset.load_yolo_for` loads.
+    Objects walk in a square field with a slowly drifting velocity and bounce back at its borders.
+    :param objects: the number of objects
+    :param frames: the number of frames
+    :param labels: the number of labels, or probabilities of every label
+    :param density: the mean number of objects in a frame per 1000 * 1000 area, which decides the field size
+    :param life: (min, max) lifetime of objects in frames
+    :param speed: the standard deviation of initial velocities
+    :param seed: random seed
+    :return: (data frame with columns [oid, fid, x, y, cls], columns, map from object id to its label, field bbox)
+    """
+    rng = np.random.default_rng(seed)
+    label_probs = np.full(labels, 1 / labels) if np.isscalar(labels) else np.asarray(labels) / np.sum(labels)
+    lives = rng.integers(life[0], life[1] + 1, objects)
+    lives = np.minimum(lives, frames)
+    starts = rng.integers(0, frames - lives + 1)
+    cls = rng.choice(len(label_probs), objects, p=label_probs).astype(np.int16)
+    concurrent = max(lives.sum() / frames, 1.)
+    side = int(np.sqrt(concurrent / density) * 1000)
+
+    oids = np.repeat(np.arange(objects, dtype=np.int32), lives)
+    traj_starts = np.cumsum(lives) - lives
+    steps = np.arange(len(oids)) - np.repeat(traj_starts, lives)
+    accelerations = rng.normal(0, speed / 8, (len(oids), 2))
+    accelerations[traj_starts] = rng.normal(0, speed, (objects, 2))  # initial velocities
+    velocities = _cumsum_by(accelerations, traj_starts, lives)
+    points = rng.uniform(0, side, (objects, 2))[oids] + _cumsum_by(velocities, traj_starts, lives)
+    points = np.abs(points) % (2 * side)  # bounce back at borders
+    points = np.where(points > side, 2 * side - points, points).astype(np.int32)
+
+    data = pd.DataFrame({'oid': oids, 'fid': (starts[oids] + steps).astype(np.int32),
+                         'x': points[:, 0], 'y': points[:, 1], 'cls': cls[oids]})
+    data = data.sort_values(['fid', 'oid'], kind='stable', ignore_index=True)
+    return data, ['oid', 'fid', 'x', 'y'], pd.Series(cls, name='cls'), (0, side, 0, side)
+
+
+def synthetic_borders(bbox, grid=(8, 6)):
+    """
+    :param bbox: field bbox returned by `synthetic_tracks`
+    :param grid: the number of borders in every dimension, see `gen_border`
+    """
+    return gen_border(bbox, *grid)
+
+
+def _cumsum_by(values, starts, lens):
+    """
+    cumulative sums restarting at every group
+    """
+    res = np.cumsum(values, axis=0)
+    res -= np.repeat(res[starts] - values[starts], lens, axis=0)
+    return res
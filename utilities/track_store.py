@@ -0,0 +1,138 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utilities.dataset import load_rounD, load_yolo_for
+
+STORE_VERSION = 1
+# point columns, rows are sorted by (oid, fid) so that every object is a contiguous run
+POINT_COLUMNS = ['oid', 'fid', 'x', 'y']
+# per object columns, `offsets` has one more item locating the end of the last run
+OBJECT_COLUMNS = ['obj_id', 'obj_cls', 'obj_first', 'obj_last', 'obj_offsets']
+
+
+def save_tracks(path, tracks, cols_name: list, label_map):
+    """
+    write tracks as a directory of `.npy` columns and a small `meta.json`, which `TrackStore` reads lazily.
+    :param path: store directory, created if missing
+    :param tracks: pandas data frame of tracks
+    :param cols_name: [track_id, frame_id, x, y] are wanted, supply their actual properties name in order.
+    :param label_map: map traj id to its label
+    :return: None
+    """
+    oids, fids, xs, ys = (tracks[col].to_numpy() for col in cols_name)
+    order = np.lexsort((fids, oids))
+    columns = dict(zip(POINT_COLUMNS, (oids[order], fids[order], xs[order], ys[order])))
+    obj_id, starts = np.unique(columns['oid'], return_index=True)
+    offsets = np.append(starts, len(order))
+    columns.update(obj_id=obj_id, obj_cls=pd.Series(label_map).reindex(obj_id).to_numpy().astype(np.int16),
+                   obj_first=columns['fid'][starts], obj_last=columns['fid'][offsets[1:] - 1], obj_offsets=offsets)
+    os.makedirs(path, exist_ok=True)
+    for name, column in columns.items():
+        np.save(os.path.join(path, f'{name}.npy'), column)
+    bbox = [xs.min().item(), xs.max().item(), ys.min().item(), ys.max().item()] if len(xs) else None
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'version': STORE_VERSION, 'rows': len(order), 'objects': len(obj_id), 'bbox': bbox}, f)
+
+
+def convert_yolo(filename, path):
+    """
+    convert a pickle read by `load_yolo_for` to a track store
+    """
+    data, cols, cls_map = load_yolo_for(filename)
+    save_tracks(path, data, cols, cls_map)
+
+
+def convert_rounD(data_path, track_id, path):
+    """
+    convert a recording of rounD read by `load_rounD` to a track store
+    """
+    cls_map, data = load_rounD(data_path, track_id)
+    save_tracks(path, data, ['trackId', 'frame', 'xCenter', 'yCenter'], cls_map)
+
+
+class TrackStore:
+    def __init__(self, path, mmap_mode='r'):
+        """
+        tracks written by `save_tracks`. Columns are memory-mapped, so that reading is bounded by chunks.
+        :param path: store directory
+        :param mmap_mode: passed to `np.load`, None to read everything into memory
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != STORE_VERSION:
+            raise ValueError(f'unsupported track store version: {meta["version"]}')
+        self.bbox = meta['bbox']
+        for name in POINT_COLUMNS + OBJECT_COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode))
+
+    def __len__(self):
+        return len(self.oid)
+
+    @property
+    def columns(self):
+        return POINT_COLUMNS
+
+    @property
+    def label_map(self):
+        return pd.Series(self.obj_cls, index=self.obj_id, name='cls')
+
+    def _blocks(self, frames, chunk):
+        """
+        :return: iterator of (object indices, first row), objects overlapping frames and their rows are at most
+            chunk rows but one object
+        """
+        objs = np.arange(len(self.obj_id)) if frames is None else \
+            np.flatnonzero((self.obj_first <= frames[1]) & (self.obj_last >= frames[0]))
+        starts, ends = self.obj_offsets[objs], self.obj_offsets[objs + 1]
+        a = 0
+        while a < len(objs):
+            b = max(np.searchsorted(ends, starts[a] + chunk, 'right'), a + 1)
+            yield objs[a:b], starts[a]
+            a = b
+
+    def trajs(self, fps, scale=100, frames=None, chunk=1 << 20):
+        """
+        stream trajectories the same as `traj_data` does, reading at most about $chunk points at a time.
+        :param fps: integer
+        :param scale: the unit of our coordinate is 'cm', tell us how we scale raw (x, y).
+        :param frames: [first, last] frames wanted, None for all
+        :param chunk: the number of points read at a time
+        :return: iterator of (tid, start_frame, cls_id, track)
+        """
+        for objs, base in self._blocks(frames, chunk):
+            end = self.obj_offsets[objs[-1] + 1]
+            fids = np.asarray(self.fid[base:end])
+            points = np.column_stack((self.x[base:end], self.y[base:end]))
+            for obj in objs.tolist():
+                lo, hi = self.obj_offsets[obj] - base, self.obj_offsets[obj + 1] - base
+                if frames is not None:
+                    lo, hi = lo + np.searchsorted(fids[lo:hi], [frames[0], frames[1] + 1])
+                    if lo == hi:
+                        continue
+                yield self.obj_id[obj], fids[lo], self.obj_cls[obj], (points[lo:hi:fps] * scale).astype(np.int32)
+
+    def rows(self, frames=None, chunk=1 << 20):
+        """
+        stream points as data frames with columns [oid, fid, x, y, cls], sorted by (oid, fid)
+        :param frames: [first, last] frames wanted, None for all
+        :param chunk: the number of points read at a time
+        """
+        for objs, base in self._blocks(frames, chunk):
+            end = self.obj_offsets[objs[-1] + 1]
+            df = pd.DataFrame({name: np.asarray(getattr(self, name)[base:end]) for name in POINT_COLUMNS})
+            df['cls'] = np.repeat(self.obj_cls[objs[0]:objs[-1] + 1], np.diff(self.obj_offsets[objs[0]:objs[-1] + 2]))
+            if frames is not None:
+                df = df[df['fid'].between(*frames)]
+            yield df
+
+    def read(self, frames=None):
+        """
+        :return: points within frames as `load_yolo_for` returns, which are sorted by fid
+        """
+        chunks = list(self.rows(frames))
+        data = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=POINT_COLUMNS + ['cls'])
+        data = data.sort_values(['fid', 'oid'], kind='stable', ignore_index=True)
+        return data, POINT_COLUMNS, self.label_map